@@ -0,0 +1,113 @@
+"""
+Evaluate local pre-summarization against the old blind content[:2000] prefix.
+
+    cd backend && python -m benchmarks.extractive_eval --jsonl eval.jsonl
+    cd backend && python -m benchmarks.extractive_eval --from-db 200
+    cd backend && python -m benchmarks.extractive_eval --from-db 50 --llm
+
+Each item needs `title`, `content` and a reference `summary`. With --from-db
+the reference is the summary already stored for analyzed feeds. Reported:
+
+- content tokens sent (estimate) for prefix vs extract
+- coverage: share of reference-summary terms present in the text sent
+- with --llm: term overlap of the newly generated summary with the reference
+"""
+import argparse
+import asyncio
+import json
+import re
+from statistics import mean
+
+from config import get_settings
+from services.extractive_service import clean_text, estimate_tokens, extract
+
+settings = get_settings()
+
+_TERM_RE = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]")
+
+
+def _terms(text: str) -> set:
+    chars = _TERM_RE.findall((text or "").lower())
+    # Chinese characters as bigrams, English as words
+    return {a + b if a >= "\u4e00" and b >= "\u4e00" else a for a, b in zip(chars, chars[1:] + [""])}
+
+
+def coverage(reference: str, text: str) -> float:
+    ref = _terms(reference)
+    return len(ref & _terms(text)) / len(ref) if ref else 0.0
+
+
+def load_jsonl(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_from_db(limit: int):
+    from database import SessionLocal
+    import models
+
+    db = SessionLocal()
+    try:
+        feeds = db.query(models.Feed).filter(
+            models.Feed.is_analyzed == True,
+            models.Feed.content.isnot(None),
+        ).order_by(models.Feed.id).limit(limit).all()
+        return [{"title": f.title, "content": f.content, "summary": f.summary} for f in feeds]
+    finally:
+        db.close()
+
+
+async def llm_summary(title: str, content: str) -> str:
+    from services.ai_service import build_analysis_prompt, get_client, parse_analysis
+
+    response = get_client().chat.completions.create(
+        model=settings.qwen_model,
+        messages=[{"role": "user", "content": build_analysis_prompt(title, content)}],
+        temperature=0,
+        max_tokens=1000,
+    )
+    return parse_analysis(response.choices[0].message.content)["summary"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--jsonl", help="evaluation set, one {title, content, summary} per line")
+    source.add_argument("--from-db", type=int, metavar="N", help="use N analyzed feeds as the set")
+    parser.add_argument("--budget", type=int, default=settings.analysis_content_token_budget)
+    parser.add_argument("--llm", action="store_true", help="also re-run the LLM on the extract")
+    args = parser.parse_args()
+
+    items = load_jsonl(args.jsonl) if args.jsonl else load_from_db(args.from_db)
+    if not items:
+        print("No evaluation items")
+        return
+
+    rows = []
+    for item in items:
+        prefix = (item["content"] or "")[:2000]
+        extracted, extracted_tokens = extract(item["content"] or "", args.budget)
+        row = {
+            "prefix_tokens": estimate_tokens(prefix),
+            "extract_tokens": extracted_tokens,
+            "prefix_coverage": coverage(item["summary"], clean_text(prefix)),
+            "extract_coverage": coverage(item["summary"], extracted),
+        }
+        if args.llm:
+            generated = asyncio.run(llm_summary(item["title"], extracted))
+            row["llm_overlap"] = coverage(item["summary"], generated)
+        rows.append(row)
+
+    prefix_tokens = sum(r["prefix_tokens"] for r in rows)
+    extract_tokens = sum(r["extract_tokens"] for r in rows)
+    print(f"items:            {len(rows)} (budget {args.budget} tokens)")
+    print(f"content tokens:   prefix {prefix_tokens}  extract {extract_tokens}  "
+          f"saved {(1 - extract_tokens / max(prefix_tokens, 1)) * 100:.1f}%")
+    print(f"summary coverage: prefix {mean(r['prefix_coverage'] for r in rows):.3f}  "
+          f"extract {mean(r['extract_coverage'] for r in rows):.3f}")
+    if args.llm:
+        print(f"LLM overlap:      {mean(r['llm_overlap'] for r in rows):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Microbenchmark: list endpoint serialization, ORM + pydantic + json (old path)
+versus column tuples + orjson (serializers.py).
+
+    cd backend && python -m benchmarks.list_serialization [--notes 100] [--feeds 50]
+
+Runs against a throwaway in-memory database; no .env needed.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import List
+
+os.environ.setdefault("ACCESS_TOKEN", "benchmark")
+os.environ.setdefault("QWEN_API_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+import models
+import schemas
+import serializers
+
+
+def build_session(n_notes: int, n_feeds: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    source = models.RSSSource(name="Bench", url="https://example.com/rss", category="AI行业新闻")
+    db.add(source)
+    tags = [models.Tag(name=f"tag-{i}") for i in range(20)]
+    db.add_all(tags)
+    db.flush()
+
+    for i in range(n_feeds):
+        db.add(models.Feed(
+            source_id=source.id, title=f"Feed {i}", original_title=f"Feed {i}",
+            link=f"https://example.com/{i}", published_at=datetime.utcnow(),
+            content="Lorem ipsum dolor sit amet. " * 80, summary="1. a\n2. b\n3. c",
+        ))
+    for i in range(n_notes):
+        note = models.Note(title=f"Note {i}", content="## Heading\n" + "正文内容 " * 150, category="AI技术")
+        note.tags = tags[i % 17:i % 17 + 3]
+        db.add(note)
+    db.commit()
+    return db
+
+
+def old_notes(db):
+    notes = db.query(models.Note).order_by(models.Note.updated_at.desc()).limit(100).all()
+    validated = TypeAdapter(List[schemas.NoteResponse]).validate_python(notes, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False).encode("utf-8")
+
+
+def new_notes(db):
+    stmt = select(*serializers.NOTE_COLUMNS).order_by(models.Note.updated_at.desc()).limit(100)
+    return orjson.dumps(serializers.note_rows(db, stmt))
+
+
+def old_feeds(db):
+    feeds = db.query(models.Feed).order_by(models.Feed.published_at.desc()).limit(50).all()
+    validated = TypeAdapter(List[schemas.FeedResponse]).validate_python(feeds, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False).encode("utf-8")
+
+
+def new_feeds(db):
+    stmt = serializers.feed_list_statement().order_by(models.Feed.published_at.desc()).limit(50)
+    return orjson.dumps(serializers.feed_rows(db, stmt))
+
+
+def cpu_per_call(fn, db, repeat: int) -> float:
+    fn(db)  # warm up
+    db.expire_all()
+    started = time.process_time()
+    for _ in range(repeat):
+        fn(db)
+        db.expire_all()  # each request gets a fresh session in the API
+    return (time.process_time() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=100)
+    parser.add_argument("--feeds", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    db = build_session(args.notes, args.feeds)
+
+    for name, old, new in (("GET /notes/", old_notes, new_notes), ("GET /feeds/", old_feeds, new_feeds)):
+        old_ms = cpu_per_call(old, db, args.repeat)
+        new_ms = cpu_per_call(new, db, args.repeat)
+        print(f"{name:12} old {old_ms:7.3f} ms  new {new_ms:7.3f} ms  CPU -{(1 - new_ms / old_ms) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
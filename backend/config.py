@@ -1,5 +1,15 @@
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Optional
+
+
+class AnalysisRoute(BaseModel):
+    """A model choice for feeds whose extracted content fits max_content_tokens"""
+    name: str
+    model: Optional[str] = None  # None means qwen_model
+    max_content_tokens: Optional[int] = None  # None matches everything
+    max_tokens: int = 600  # output budget, before the title translation allowance
 
 
 class Settings(BaseSettings):
@@ -10,6 +20,66 @@ class Settings(BaseSettings):
     database_url: str = "sqlite:///./brain_sync.db"
     rss_fetch_interval_hours: int = 6  # RSS fetch interval in hours
     
+    # Feed retention & database maintenance
+    feed_retention_days: int = 90  # read/archived feeds older than this are compacted
+    feed_retention_mode: str = "compact"  # compact (move content to cold table) or purge
+    feed_retention_batch_size: int = 200  # rows per write transaction
+    maintenance_interval_hours: int = 24  # 0 disables the scheduled run
+    vacuum_pages_per_run: int = 2000  # pages released by each incremental vacuum
+    
+    # Background jobs (see worker.py)
+    job_lease_seconds: int = 300  # a crashed worker's job is re-claimed after this
+    job_max_attempts: int = 3
+    worker_poll_interval_seconds: float = 2.0
+    analyze_wait_seconds: float = 5.0  # how long POST /feeds/{id}/analyze?wait=true waits for the worker
+    embedded_worker: bool = False  # run a worker thread inside the API process
+    fetch_cooldown_seconds: int = 60  # a source can't be re-fetched sooner than this
+    snapshot_archive_enabled: bool = True  # keep raw feed bodies for offline replay
+    snapshot_retention_days: int = 30  # snapshots older than this are dropped by maintenance (0 keeps all)
+    
+    # OPML import: URLs are probed in parallel before sources are created
+    opml_validate_concurrency: int = 16
+    opml_validate_timeout_seconds: float = 10.0
+    
+    # Online backups (see services/backup_service.py)
+    backup_dir: str = "./backups"
+    backup_interval_hours: int = 24  # 0 disables the scheduled backup
+    backup_keep: int = 7  # newest backups kept
+    backup_pages_per_step: int = 256  # pages copied per backup step
+    backup_step_pause_seconds: float = 0.01  # pause between steps so writers get the lock
+    
+    # Analysis prompt: article content is pre-summarized locally to this many tokens
+    analysis_content_token_budget: int = 800
+    
+    # Category digests (map-reduce over feed summaries, see services/digest_service.py)
+    digest_refresh_interval_hours: float = 1.0  # 0 disables the scheduled refresh
+    digest_utc_offset_hours: int = 8  # local day/week boundaries (UTC+8)
+    digest_prompt_token_budget: int = 3000  # input tokens per map/reduce prompt
+    digest_item_tokens: int = 150  # per-feed share of a map prompt
+    digest_model: Optional[str] = None  # None means qwen_model
+    digest_llm_concurrency: int = 4  # parallel map/reduce calls per digest
+    
+    # Server-sent events
+    event_poll_interval_seconds: float = 1.0  # how often each API process reads new events
+    event_client_buffer: int = 100  # events queued per client before it must resync
+    event_retention_hours: int = 24
+    
+    # Local note classifier: full retrain after this many saved notes
+    classifier_retrain_every: int = 20
+    
+    # Profiling: requests with "X-Profile: 1" and a valid token are always profiled
+    profile_sample_rate: float = 0.0  # fraction of other requests and jobs profiled
+    profile_dir: str = "./profiles"
+    profile_keep: int = 50  # newest profiles kept
+    slow_query_ms: float = 200.0  # 0 disables the slow-query log
+    slow_query_log_size: int = 200  # entries kept per process
+    
+    # Model routing, first matching route wins (JSON list in ANALYSIS_ROUTES)
+    analysis_routes: List[AnalysisRoute] = [
+        AnalysisRoute(name="short", model="qwen-turbo", max_content_tokens=300, max_tokens=400),
+        AnalysisRoute(name="long", max_tokens=600),
+    ]
+    
     class Config:
         env_file = ".env"
 
@@ -19,3 +19,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def insert_ignoring_conflicts(model):
+    """Dialect-specific insert() so callers can use .on_conflict_do_nothing()"""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
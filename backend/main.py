@@ -1,28 +1,89 @@
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
-from database import engine, Base, get_db
-from routers import auth, rss, feeds, notes
+from config import get_settings
+from database import SessionLocal
+from migrations import run_migrations
+from routers import auth, rss, feeds, notes, maintenance, jobs, events, export, profiling, digests
 from services.rss_service import sync_sources_from_config
+from services.maintenance_service import maintenance_loop
+from services.backup_service import backup_loop
+from services.digest_service import digest_loop
+from services.classifier_service import retrain_in_background
+from services.event_service import broker
+from services.profiling_service import ProfilingMiddleware, instrument_endpoints
+
+_import_seconds = time.perf_counter() - _import_started
+
+settings = get_settings()
+
+# Startup phase timings in milliseconds, reported by /health
+startup_timings = {}
 
 
 # Lifespan event handler
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: auto-sync RSS sources from config
+    # Startup: migrate schema and auto-sync RSS sources from config
     print("🚀 Starting up Brain-Sync API...")
-    Base.metadata.create_all(bind=engine)
+    started = time.perf_counter()
+    startup_timings["imports_ms"] = round(_import_seconds * 1000, 1)
     
+    phase = time.perf_counter()
+    migration = run_migrations()
+    startup_timings["migrations_ms"] = round((time.perf_counter() - phase) * 1000, 1)
+    if migration["applied"]:
+        print(f"✅ Applied schema migrations: {migration}")
+    
+    phase = time.perf_counter()
+    db = SessionLocal()
     try:
-        db = next(get_db())
         result = sync_sources_from_config(db)
         print(f"✅ Auto-synced RSS sources: {result}")
     except Exception as e:
         print(f"⚠️ Failed to auto-sync RSS sources: {e}")
+    finally:
+        db.close()
+    startup_timings["config_sync_ms"] = round((time.perf_counter() - phase) * 1000, 1)
+    
+    startup_timings["lifespan_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"⏱️ Startup timings: {startup_timings}")
+    
+    # Train the note classifier without delaying startup
+    retrain_in_background()
+    
+    # Scheduled retention + incremental vacuum, and online backups
+    maintenance_task = asyncio.create_task(maintenance_loop())
+    backup_task = asyncio.create_task(backup_loop())
+    
+    # Periodically queue digest refreshes for the workers
+    digest_task = asyncio.create_task(digest_loop())
+    
+    # Fan out events from the DB to this process's SSE clients
+    event_task = asyncio.create_task(broker.run())
+    
+    # Single-process deployments can run the job worker in-process
+    worker_stop = threading.Event()
+    if settings.embedded_worker:
+        from worker import start_worker_threads
+        start_worker_threads(stop=worker_stop)
+        print("🛠️ Embedded worker started")
     
     yield
     
     # Shutdown
+    worker_stop.set()
+    maintenance_task.cancel()
+    backup_task.cancel()
+    digest_task.cancel()
+    event_task.cancel()
     print("👋 Shutting down Brain-Sync API...")
 
 
@@ -42,11 +103,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip everything except the SSE stream (gzip would buffer it) and zip exports"""
+    
+    excluded_prefixes = ("/events", "/export/markdown")
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.excluded_prefixes):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress large payloads (feed/note lists); small responses aren't worth it
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1024)
+
+# Opt-in request profiling and route tagging for the slow-query log
+app.add_middleware(ProfilingMiddleware)
+
 # Include routers
 app.include_router(auth.router, tags=["Authentication"])
 app.include_router(rss.router)
 app.include_router(feeds.router)
 app.include_router(notes.router)
+app.include_router(maintenance.router)
+app.include_router(jobs.router)
+app.include_router(events.router)
+app.include_router(export.router)
+app.include_router(profiling.router)
+app.include_router(digests.router)
 
 
 @app.get("/")
@@ -60,7 +145,11 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "startup": startup_timings}
+
+
+# After every route is registered, or the ones added later go unprofiled
+instrument_endpoints(app)
 
 
 if __name__ == "__main__":
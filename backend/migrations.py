@@ -0,0 +1,372 @@
+"""
+Versioned schema migrations.
+
+The applied version is kept in SQLite's `PRAGMA user_version`, so checking
+whether the schema is current on startup is a single O(1) read instead of
+introspecting every table the way `Base.metadata.create_all` does.
+
+To change the schema, append a function to MIGRATIONS. Never edit or reorder
+migrations that have already shipped.
+"""
+from sqlalchemy.engine import Connection
+
+from database import engine, Base
+import models  # registers the tables for the create_all fallback
+
+
+# Schema as of versioning, frozen: later model changes must not leak into
+# migration 1, they get their own migration below
+INITIAL_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS rss_sources (
+        id INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        url VARCHAR NOT NULL,
+        type VARCHAR,
+        category VARCHAR,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (url)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_rss_sources_id ON rss_sources (id)",
+    """CREATE TABLE IF NOT EXISTS tags (
+        id INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        UNIQUE (name)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_tags_id ON tags (id)",
+    """CREATE TABLE IF NOT EXISTS app_state (
+        "key" VARCHAR NOT NULL,
+        value VARCHAR,
+        updated_at DATETIME,
+        PRIMARY KEY ("key")
+    )""",
+    """CREATE TABLE IF NOT EXISTS feeds (
+        id INTEGER NOT NULL,
+        source_id INTEGER NOT NULL,
+        title VARCHAR NOT NULL,
+        original_title VARCHAR,
+        link VARCHAR NOT NULL,
+        published_at DATETIME,
+        content TEXT,
+        is_analyzed BOOLEAN,
+        translated_title VARCHAR,
+        summary TEXT,
+        insight TEXT,
+        is_read BOOLEAN,
+        is_archived BOOLEAN,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(source_id) REFERENCES rss_sources (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_feeds_id ON feeds (id)",
+    """CREATE TABLE IF NOT EXISTS feed_cold_content (
+        feed_id INTEGER NOT NULL,
+        content_gz BLOB NOT NULL,
+        original_size INTEGER,
+        compacted_at DATETIME,
+        PRIMARY KEY (feed_id),
+        FOREIGN KEY(feed_id) REFERENCES feeds (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS notes (
+        id INTEGER NOT NULL,
+        title VARCHAR NOT NULL,
+        content TEXT NOT NULL,
+        category VARCHAR NOT NULL,
+        feed_id INTEGER,
+        original_link VARCHAR,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(feed_id) REFERENCES feeds (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_notes_id ON notes (id)",
+    """CREATE TABLE IF NOT EXISTS note_tags (
+        note_id INTEGER,
+        tag_id INTEGER,
+        FOREIGN KEY(note_id) REFERENCES notes (id),
+        FOREIGN KEY(tag_id) REFERENCES tags (id)
+    )""",
+)
+
+
+# Tables added by later migrations, frozen as of the version that added them
+JOBS_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER NOT NULL,
+        kind VARCHAR NOT NULL,
+        target_id INTEGER,
+        status VARCHAR,
+        attempts INTEGER,
+        max_attempts INTEGER,
+        run_after DATETIME,
+        lease_owner VARCHAR,
+        lease_token VARCHAR,
+        lease_expires_at DATETIME,
+        result TEXT,
+        error TEXT,
+        created_at DATETIME,
+        updated_at DATETIME,
+        PRIMARY KEY (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_id ON jobs (id)",
+    "CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status)",
+)
+
+ANALYSIS_LOGS_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS analysis_logs (
+        id INTEGER NOT NULL,
+        feed_id INTEGER,
+        content_tokens_prefix INTEGER,
+        content_tokens_sent INTEGER,
+        prompt_tokens INTEGER,
+        completion_tokens INTEGER,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(feed_id) REFERENCES feeds (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_analysis_logs_feed_id ON analysis_logs (feed_id)",
+    "CREATE INDEX IF NOT EXISTS ix_analysis_logs_id ON analysis_logs (id)",
+)
+
+FEED_SNAPSHOT_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS feed_blobs (
+        sha256 VARCHAR NOT NULL,
+        data BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        compressed_size INTEGER NOT NULL,
+        created_at DATETIME,
+        PRIMARY KEY (sha256)
+    )""",
+    """CREATE TABLE IF NOT EXISTS feed_snapshots (
+        id INTEGER NOT NULL,
+        source_id INTEGER,
+        sha256 VARCHAR NOT NULL,
+        url VARCHAR,
+        fetched_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(source_id) REFERENCES rss_sources (id),
+        FOREIGN KEY(sha256) REFERENCES feed_blobs (sha256)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_feed_snapshots_fetched_at ON feed_snapshots (fetched_at)",
+    "CREATE INDEX IF NOT EXISTS ix_feed_snapshots_id ON feed_snapshots (id)",
+    "CREATE INDEX IF NOT EXISTS ix_feed_snapshots_sha256 ON feed_snapshots (sha256)",
+    "CREATE INDEX IF NOT EXISTS ix_feed_snapshots_source_id ON feed_snapshots (source_id)",
+)
+
+EVENTS_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS events (
+        id INTEGER NOT NULL,
+        type VARCHAR NOT NULL,
+        payload TEXT,
+        created_at DATETIME,
+        PRIMARY KEY (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_events_created_at ON events (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_events_id ON events (id)",
+)
+
+DIGEST_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS digests (
+        id INTEGER NOT NULL,
+        period VARCHAR NOT NULL,
+        period_start DATETIME NOT NULL,
+        period_end DATETIME NOT NULL,
+        category VARCHAR NOT NULL,
+        content TEXT,
+        feed_count INTEGER,
+        chunk_count INTEGER,
+        status VARCHAR,
+        built_at DATETIME,
+        created_at DATETIME,
+        PRIMARY KEY (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_digests_id ON digests (id)",
+    """CREATE TABLE IF NOT EXISTS digest_chunks (
+        id INTEGER NOT NULL,
+        digest_id INTEGER NOT NULL,
+        feed_ids TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        created_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(digest_id) REFERENCES digests (id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_digest_chunks_digest_id ON digest_chunks (digest_id)",
+    "CREATE INDEX IF NOT EXISTS ix_digest_chunks_id ON digest_chunks (id)",
+)
+
+
+def _execute_all(conn: Connection, statements):
+    for statement in statements:
+        conn.exec_driver_sql(statement)
+
+
+def _initial_schema(conn: Connection):
+    # Idempotent: only creates tables missing from databases made before versioning
+    _execute_all(conn, INITIAL_SCHEMA)
+
+
+def _feed_indexes(conn: Connection):
+    # Feed list ordering and retention scans
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_feeds_published_at ON feeds (published_at)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_feeds_created_at ON feeds (created_at)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_feeds_link ON feeds (link)")
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_notes_feed_id ON notes (feed_id)")
+
+
+def _jobs_table(conn: Connection):
+    _execute_all(conn, JOBS_SCHEMA)
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_jobs_claim ON jobs (status, run_after)"
+    )
+
+
+def _single_flight_constraints(conn: Connection):
+    # Collapse duplicate feeds created by concurrent fetches onto one row: the
+    # analyzed one if any, then one the user has read or archived, then the oldest
+    conn.exec_driver_sql("""
+        CREATE TEMP TABLE feed_dupes AS
+        SELECT id AS dupe_id, keep_id FROM (
+            SELECT id, FIRST_VALUE(id) OVER (
+                PARTITION BY link
+                ORDER BY COALESCE(is_analyzed, 0) DESC,
+                         MAX(COALESCE(is_read, 0), COALESCE(is_archived, 0)) DESC,
+                         id
+            ) AS keep_id
+            FROM feeds
+            WHERE link IN (SELECT link FROM feeds GROUP BY link HAVING COUNT(*) > 1)
+        )
+        WHERE id != keep_id
+    """)
+    # The survivor keeps any read/archived flag set on one of its duplicates
+    conn.exec_driver_sql("""
+        UPDATE feeds SET
+            is_read = (SELECT MAX(COALESCE(f.is_read, 0)) FROM feeds f WHERE f.link = feeds.link),
+            is_archived = (SELECT MAX(COALESCE(f.is_archived, 0)) FROM feeds f WHERE f.link = feeds.link)
+        WHERE id IN (SELECT keep_id FROM feed_dupes)
+    """)
+    conn.exec_driver_sql("""
+        UPDATE notes SET feed_id = (SELECT keep_id FROM feed_dupes WHERE dupe_id = notes.feed_id)
+        WHERE feed_id IN (SELECT dupe_id FROM feed_dupes)
+    """)
+    # Compacted content moves over if the survivor has none of its own
+    conn.exec_driver_sql("""
+        UPDATE feed_cold_content SET feed_id = (SELECT keep_id FROM feed_dupes WHERE dupe_id = feed_cold_content.feed_id)
+        WHERE feed_id IN (
+            SELECT MIN(d.dupe_id) FROM feed_dupes d
+            JOIN feed_cold_content c ON c.feed_id = d.dupe_id
+            JOIN feeds k ON k.id = d.keep_id
+            WHERE k.content IS NULL
+              AND d.keep_id NOT IN (SELECT feed_id FROM feed_cold_content)
+            GROUP BY d.keep_id
+        )
+    """)
+    conn.exec_driver_sql("DELETE FROM feed_cold_content WHERE feed_id IN (SELECT dupe_id FROM feed_dupes)")
+    conn.exec_driver_sql("DELETE FROM feeds WHERE id IN (SELECT dupe_id FROM feed_dupes)")
+    conn.exec_driver_sql("DROP TABLE feed_dupes")
+    conn.exec_driver_sql("DROP INDEX IF EXISTS ix_feeds_link")
+    conn.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ux_feeds_link ON feeds (link)")
+
+    # At most one active job per (kind, target)
+    conn.exec_driver_sql("""
+        UPDATE jobs SET status = 'failed', error = 'Duplicate of an active job'
+        WHERE status IN ('pending', 'running') AND id NOT IN (
+            SELECT MIN(id) FROM jobs WHERE status IN ('pending', 'running') GROUP BY kind, target_id
+        )
+    """)
+    conn.exec_driver_sql("""
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_jobs_active ON jobs (kind, target_id)
+        WHERE status IN ('pending', 'running')
+    """)
+
+
+def _analysis_logs_table(conn: Connection):
+    _execute_all(conn, ANALYSIS_LOGS_SCHEMA)
+
+
+def _analysis_log_routing(conn: Connection):
+    for name, sql_type in (("route", "VARCHAR"), ("model", "VARCHAR"), ("language", "VARCHAR"), ("latency_ms", "INTEGER")):
+        conn.exec_driver_sql(f"ALTER TABLE analysis_logs ADD COLUMN {name} {sql_type}")
+
+
+def _feed_snapshot_tables(conn: Connection):
+    _execute_all(conn, FEED_SNAPSHOT_SCHEMA)
+
+
+def _events_table(conn: Connection):
+    _execute_all(conn, EVENTS_SCHEMA)
+
+
+def _digest_tables(conn: Connection):
+    _execute_all(conn, DIGEST_SCHEMA)
+    # The digest endpoint reads through this index only
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_digests_period ON digests (period, period_start, category)"
+    )
+
+
+def _incremental_auto_vacuum(conn: Connection):
+    # Switching auto_vacuum needs one full VACUUM; doing it here, once, keeps
+    # the periodic maintenance job to short incremental_vacuum steps
+    conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+    if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:  # 2 == INCREMENTAL
+        conn.exec_driver_sql("VACUUM")
+
+
+# VACUUM can't run inside a transaction; these run without BEGIN/COMMIT
+AUTOCOMMIT_MIGRATIONS = {_incremental_auto_vacuum}
+
+MIGRATIONS = [
+    _initial_schema,
+    _feed_indexes,
+    _jobs_table,
+    _single_flight_constraints,
+    _analysis_logs_table,
+    _analysis_log_routing,
+    _feed_snapshot_tables,
+    _events_table,
+    _digest_tables,
+    _incremental_auto_vacuum,
+]
+
+LATEST_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def run_migrations() -> dict:
+    """Bring the database schema up to LATEST_VERSION"""
+    if engine.dialect.name != "sqlite":
+        # No user_version outside SQLite; fall back to create_all
+        Base.metadata.create_all(bind=engine)
+        return {"from": None, "to": None, "applied": 0}
+
+    # pysqlite doesn't open a transaction before DDL, so each step gets an
+    # explicit BEGIN/COMMIT and its user_version bump commits with it
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        current = get_schema_version(conn)
+        if current >= LATEST_VERSION:
+            return {"from": current, "to": current, "applied": 0}
+
+        # WAL lets the API keep reading while worker processes write. It can't
+        # be switched inside a transaction, so it is set here rather than in a step
+        conn.exec_driver_sql("PRAGMA journal_mode = WAL")
+
+        for version, migration in enumerate(MIGRATIONS[current:], start=current + 1):
+            if migration in AUTOCOMMIT_MIGRATIONS:
+                migration(conn)
+                conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+                continue
+            conn.exec_driver_sql("BEGIN")
+            try:
+                migration(conn)
+                conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+            except Exception:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            conn.exec_driver_sql("COMMIT")
+
+    return {"from": current, "to": LATEST_VERSION, "applied": LATEST_VERSION - current}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Table, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -51,6 +51,16 @@ class Feed(Base):
     source = relationship("RSSSource", back_populates="feeds")
 
 
+class FeedColdContent(Base):
+    """Compressed content of feeds compacted by the retention policy"""
+    __tablename__ = "feed_cold_content"
+    
+    feed_id = Column(Integer, ForeignKey("feeds.id"), primary_key=True)
+    content_gz = Column(LargeBinary, nullable=False)  # zlib-compressed UTF-8
+    original_size = Column(Integer, default=0)
+    compacted_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Note(Base):
     __tablename__ = "notes"
     
@@ -77,3 +87,113 @@ class Tag(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     notes = relationship("Note", secondary=note_tags, back_populates="tags")
+
+
+class AppState(Base):
+    """Small key/value store for internal bookkeeping (e.g. config hashes)"""
+    __tablename__ = "app_state"
+    
+    key = Column(String, primary_key=True)
+    value = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class Job(Base):
+    """Work item leased by worker processes (see worker.py)"""
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # fetch_source, analyze_feed, build_digest
+    target_id = Column(Integer)  # RSSSource.id, Feed.id or Digest.id depending on kind
+    status = Column(String, default="pending", index=True)  # pending, running, done, failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    run_after = Column(DateTime, default=datetime.utcnow)
+    
+    # Lease held by the worker currently running the job
+    lease_owner = Column(String)
+    lease_token = Column(String)
+    lease_expires_at = Column(DateTime)
+    
+    result = Column(Text)  # JSON
+    error = Column(Text)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class AnalysisLog(Base):
+    """Prompt size and token usage of each LLM analysis call"""
+    __tablename__ = "analysis_logs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    feed_id = Column(Integer, ForeignKey("feeds.id"), index=True)
+    content_tokens_prefix = Column(Integer)  # estimate for the old content[:2000] prefix
+    content_tokens_sent = Column(Integer)  # estimate for the extract actually sent
+    prompt_tokens = Column(Integer)  # as reported by the API
+    completion_tokens = Column(Integer)
+    route = Column(String)  # analysis route name, see config.analysis_routes
+    model = Column(String)
+    language = Column(String)  # detected title language
+    latency_ms = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class FeedBlob(Base):
+    """Raw downloaded feed body, content-addressed so identical bodies are stored once"""
+    __tablename__ = "feed_blobs"
+    
+    sha256 = Column(String, primary_key=True)
+    data = Column(LargeBinary, nullable=False)  # zlib-compressed body
+    size = Column(Integer, nullable=False)
+    compressed_size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class FeedSnapshot(Base):
+    """One download of an RSS source, pointing at its body in feed_blobs"""
+    __tablename__ = "feed_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source_id = Column(Integer, ForeignKey("rss_sources.id"), index=True)
+    sha256 = Column(String, ForeignKey("feed_blobs.sha256"), nullable=False, index=True)
+    url = Column(String)
+    fetched_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class Event(Base):
+    """Change notification pushed to clients over /events/stream"""
+    __tablename__ = "events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    type = Column(String, nullable=False)  # feeds.new, feed.analyzed, note.created, ...
+    payload = Column(Text)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class Digest(Base):
+    """Precomputed digest of one source category over one day or week"""
+    __tablename__ = "digests"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    period = Column(String, nullable=False)  # daily or weekly
+    period_start = Column(DateTime, nullable=False)  # UTC start of the local day/week
+    period_end = Column(DateTime, nullable=False)
+    category = Column(String, nullable=False)  # RSSSource.category
+    content = Column(Text)  # final reduced digest (Markdown)
+    feed_count = Column(Integer, default=0)
+    chunk_count = Column(Integer, default=0)
+    status = Column(String, default="pending")  # pending or ready
+    built_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DigestChunk(Base):
+    """Map-step summary of a batch of feeds; kept so refreshes only summarize new feeds"""
+    __tablename__ = "digest_chunks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    digest_id = Column(Integer, ForeignKey("digests.id"), nullable=False, index=True)
+    feed_ids = Column(Text, nullable=False)  # JSON list of the feeds summarized
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+import hashlib
+import hmac
+import time
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 from config import get_settings
 import models
@@ -9,6 +12,8 @@ import schemas
 router = APIRouter()
 settings = get_settings()
 
+STREAM_TOKEN_SECONDS = 60  # only has to outlive connecting; reconnects fetch a new one
+
 
 def verify_token(authorization: str = Header(None)):
     """Simple token verification"""
@@ -27,6 +32,30 @@ def verify_token(authorization: str = Header(None)):
     return True
 
 
+def _stream_signature(expires: int) -> str:
+    return hmac.new(settings.access_token.encode(), f"stream:{expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def issue_stream_token() -> dict:
+    """Short-lived token for URLs (EventSource can't set headers), so ACCESS_TOKEN never lands in logs"""
+    expires = int(time.time()) + STREAM_TOKEN_SECONDS
+    return {"token": f"{expires}.{_stream_signature(expires)}", "expires_in": STREAM_TOKEN_SECONDS}
+
+
+def verify_stream_token(authorization: str = Header(None), token: Optional[str] = Query(None)):
+    """Accept the access token in the Authorization header or a stream token in ?token="""
+    if authorization or not token:
+        return verify_token(authorization)
+    
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or not hmac.compare_digest(signature, _stream_signature(int(expires))):
+        raise HTTPException(status_code=401, detail="Invalid stream token")
+    if int(expires) < time.time():
+        raise HTTPException(status_code=401, detail="Stream token expired")
+    
+    return True
+
+
 @router.post("/auth/verify")
 async def verify_auth(auth_req: schemas.AuthRequest):
     """Verify access token"""
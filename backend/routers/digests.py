@@ -0,0 +1,52 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from database import get_db
+from routers.auth import verify_token
+import models
+from services.digest_service import PERIODS, digest_to_dict, local_today, period_bounds, schedule_refresh
+
+router = APIRouter(prefix="/digests", tags=["Digests"])
+
+
+@router.get("/")
+async def get_digests(
+    period: str = "daily",
+    day: Optional[date] = None,
+    category: Optional[str] = None,
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_token)
+):
+    """Get the precomputed digests of a day or week (default: the current one), one per category"""
+    try:
+        start, _ = period_bounds(period, day or local_today())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Served from ux_digests_period; digests are built by the workers
+    query = db.query(models.Digest).filter(
+        models.Digest.period == period,
+        models.Digest.period_start == start
+    )
+    if category is not None:
+        query = query.filter(models.Digest.category == category)
+    
+    return [digest_to_dict(digest) for digest in query.order_by(models.Digest.category)]
+
+
+@router.post("/refresh")
+async def refresh_digests(
+    period: Optional[str] = None,
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_token)
+):
+    """Queue digest builds for the current and previous periods that have new feeds"""
+    if period is not None and period not in PERIODS:
+        raise HTTPException(status_code=400, detail=f"Unknown digest period: {period}")
+    
+    jobs = schedule_refresh(db, [period] if period else PERIODS)
+    return {
+        "message": f"Queued {len(jobs)} digest builds",
+        "job_ids": [job.id for job in jobs]
+    }
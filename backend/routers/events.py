@@ -0,0 +1,82 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from database import SessionLocal
+from routers.auth import issue_stream_token, verify_stream_token, verify_token
+from services.event_service import broker, events_since
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+KEEPALIVE_SECONDS = 15
+
+
+def _format(event: dict) -> str:
+    data = json.dumps(event["data"], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+def _backlog(last_id: int):
+    db = SessionLocal()
+    try:
+        return events_since(db, last_id)
+    finally:
+        db.close()
+
+
+@router.post("/token")
+async def create_stream_token(
+    authenticated: bool = Depends(verify_token)
+):
+    """Short-lived token to open /events/stream with"""
+    return issue_stream_token()
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    since: Optional[str] = Query(None, alias="last_event_id"),
+    authenticated: bool = Depends(verify_stream_token)
+):
+    """
+    Server-sent event stream: feeds.new, feed.analyzed, note.created,
+    note.updated, note.deleted, and resync when the client fell behind.
+    
+    Browsers reconnect with Last-Event-ID and get the missed events replayed;
+    a client opening a new stream (with a fresh token) passes ?last_event_id=.
+    """
+    last_event_id = last_event_id or since
+    subscriber = broker.subscribe()
+    
+    async def generate():
+        sent_id = 0
+        try:
+            yield "retry: 3000\n\n"
+            
+            if last_event_id and last_event_id.isdigit():
+                for event in await asyncio.to_thread(_backlog, int(last_event_id)):
+                    sent_id = event["id"]
+                    yield _format(event)
+            
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                
+                # Skip live events already sent from the backlog
+                if event["type"] != "resync" and event["id"] <= sent_id:
+                    continue
+                sent_id = max(sent_id, event["id"])
+                yield _format(event)
+        finally:
+            broker.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,46 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from routers.auth import verify_token
+from services.export_service import parse_kinds, ndjson_chunks, markdown_zip_chunks
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+def _kinds(include: Optional[str]):
+    try:
+        return parse_kinds(include)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _attachment(extension: str) -> dict:
+    filename = f"brain-sync-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+@router.get("/ndjson")
+def export_ndjson(
+    include: Optional[str] = None,
+    authenticated: bool = Depends(verify_token)
+):
+    """Stream notes and/or feeds (include=notes,feeds) as newline-delimited JSON"""
+    return StreamingResponse(
+        ndjson_chunks(_kinds(include)),
+        media_type="application/x-ndjson",
+        headers=_attachment("ndjson")
+    )
+
+
+@router.get("/markdown")
+def export_markdown(
+    include: Optional[str] = None,
+    authenticated: bool = Depends(verify_token)
+):
+    """Stream notes and/or feeds (include=notes,feeds) as a zip of Markdown files"""
+    return StreamingResponse(
+        markdown_zip_chunks(_kinds(include)),
+        media_type="application/zip",
+        headers=_attachment("zip")
+    )
@@ -1,11 +1,23 @@
+import asyncio
+import time
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from database import get_db
+from database import SessionLocal, get_db
+from config import get_settings
 from routers.auth import verify_token
 import models
 import schemas
-from services.ai_service import analyze_feed_with_qwen
+from serializers import feed_list_statement, feed_rows
+from services.job_service import enqueue_job, job_to_dict
+from services.maintenance_service import attach_cold_content
+from services.singleflight import SingleFlight
+
+settings = get_settings()
+analyze_flight = SingleFlight()
 
 router = APIRouter(prefix="/feeds", tags=["Feeds"])
 
@@ -20,16 +32,66 @@ async def get_feeds(
     authenticated: bool = Depends(verify_token)
 ):
     """Get all feeds with pagination"""
-    query = db.query(models.Feed)
+    stmt = feed_list_statement()
     
     if unread_only:
-        query = query.filter(models.Feed.is_read == False)
+        stmt = stmt.where(models.Feed.is_read == False)
     
     if unarchived_only:
-        query = query.filter(models.Feed.is_archived == False)
+        stmt = stmt.where(models.Feed.is_archived == False)
+    
+    stmt = stmt.order_by(models.Feed.published_at.desc()).offset(skip).limit(limit)
+    return ORJSONResponse(feed_rows(db, stmt))
+
+
+@router.get("/analysis/stats")
+async def get_analysis_stats(
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_token)
+):
+    """Prompt size before/after local pre-summarization, token usage and latency per route"""
+    row = db.query(
+        func.count(models.AnalysisLog.id),
+        func.sum(models.AnalysisLog.content_tokens_prefix),
+        func.sum(models.AnalysisLog.content_tokens_sent),
+        func.sum(models.AnalysisLog.prompt_tokens),
+        func.sum(models.AnalysisLog.completion_tokens),
+    ).filter(
+        # Digest calls have no prefix baseline; they only show up per route.
+        # (feed_id can't tell them apart: purging a feed clears it on its logs.)
+        models.AnalysisLog.content_tokens_prefix.isnot(None)
+    ).one()
+    
+    count, prefix, sent, prompt, completion = (value or 0 for value in row)
+    
+    routes = db.query(
+        models.AnalysisLog.route,
+        models.AnalysisLog.model,
+        func.count(models.AnalysisLog.id),
+        func.avg(models.AnalysisLog.latency_ms),
+        func.sum(models.AnalysisLog.prompt_tokens),
+        func.sum(models.AnalysisLog.completion_tokens),
+    ).group_by(models.AnalysisLog.route, models.AnalysisLog.model).all()
     
-    feeds = query.order_by(models.Feed.published_at.desc()).offset(skip).limit(limit).all()
-    return feeds
+    return {
+        "analyses": count,
+        "content_tokens_prefix": prefix,
+        "content_tokens_sent": sent,
+        "content_tokens_saved_pct": round((1 - sent / prefix) * 100, 1) if prefix else 0.0,
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "routes": [
+            {
+                "route": route,
+                "model": model,
+                "analyses": route_count,
+                "avg_latency_ms": round(avg_latency or 0),
+                "prompt_tokens": route_prompt or 0,
+                "completion_tokens": route_completion or 0,
+            }
+            for route, model, route_count, avg_latency, route_prompt, route_completion in routes
+        ],
+    }
 
 
 @router.get("/{feed_id}", response_model=schemas.FeedResponse)
@@ -44,16 +106,24 @@ async def get_feed(
     if not feed:
         raise HTTPException(status_code=404, detail="Feed not found")
     
-    return feed
+    # Content of old feeds may have been moved to cold storage by retention
+    return attach_cold_content(feed, db)
 
 
 @router.post("/{feed_id}/analyze", response_model=schemas.FeedAnalysisResponse)
 async def analyze_feed(
     feed_id: int,
+    wait: bool = False,
     db: Session = Depends(get_db),
     authenticated: bool = Depends(verify_token)
 ):
-    """Analyze a feed with Qwen AI"""
+    """
+    Analyze a feed with Qwen AI.
+    
+    The analysis runs in a worker; this endpoint queues it and returns a 202
+    with the job id. With wait=true it first waits up to ANALYZE_WAIT_SECONDS
+    for the result.
+    """
     feed = db.query(models.Feed).filter(models.Feed.id == feed_id).first()
     
     if not feed:
@@ -67,12 +137,42 @@ async def analyze_feed(
             "insight": feed.insight
         }
     
-    # Perform analysis
+    # Concurrent requests for the same feed in this process share one wait;
+    # across processes they share one job (see enqueue_job)
+    return await analyze_flight.do(
+        f"{feed.id}:{wait}", lambda: _wait_for_analysis(feed.id, wait)
+    )
+
+
+def _job_snapshot(feed_id: int, job_id: Optional[int] = None) -> dict:
+    # Own session: the shared wait can outlive the request that started it
+    db = SessionLocal()
     try:
-        result = await analyze_feed_with_qwen(feed, db)
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to analyze feed: {str(e)}")
+        if job_id is None:
+            return job_to_dict(enqueue_job(db, "analyze_feed", feed_id))
+        return job_to_dict(db.query(models.Job).filter(models.Job.id == job_id).one())
+    finally:
+        db.close()
+
+
+async def _wait_for_analysis(feed_id: int, wait: bool):
+    # DB calls go to the threadpool so waiting never blocks the event loop
+    job = await run_in_threadpool(_job_snapshot, feed_id)
+    
+    deadline = time.monotonic() + (settings.analyze_wait_seconds if wait else 0)
+    while job["status"] in ("pending", "running") and time.monotonic() < deadline:
+        await asyncio.sleep(0.5)
+        job = await run_in_threadpool(_job_snapshot, feed_id, job["id"])
+    
+    if job["status"] == "done":
+        return job["result"]
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Failed to analyze feed: {job['error']}")
+    
+    return JSONResponse(
+        status_code=202,
+        content={"message": "Analysis queued", "job_id": job["id"], "status": job["status"]}
+    )
 
 
 @router.patch("/{feed_id}/mark-read")
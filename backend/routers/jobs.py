@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from database import get_db
+from routers.auth import verify_token
+import models
+from services.job_service import job_to_dict
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("/")
+async def get_jobs(
+    status: Optional[str] = None,
+    kind: Optional[str] = None,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_token)
+):
+    """List recent background jobs"""
+    query = db.query(models.Job)
+    
+    if status:
+        query = query.filter(models.Job.status == status)
+    
+    if kind:
+        query = query.filter(models.Job.kind == kind)
+    
+    jobs = query.order_by(models.Job.id.desc()).limit(limit).all()
+    return [job_to_dict(job) for job in jobs]
+
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_token)
+):
+    """Get the status and result of a background job"""
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job_to_dict(job)
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from database import get_db
+from routers.auth import verify_token
+from services import maintenance_service, backup_service
+
+router = APIRouter(prefix="/maintenance", tags=["Maintenance"])
+
+
+@router.post("/run")
+def run_maintenance(
+    days: Optional[int] = None,
+    mode: Optional[str] = None,
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_token)
+):
+    """Apply the feed retention policy, then incremental VACUUM and ANALYZE"""
+    try:
+        return maintenance_service.run_maintenance(db, days=days, mode=mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/report")
+async def get_maintenance_report(
+    authenticated: bool = Depends(verify_token)
+):
+    """Get the report of the last maintenance run"""
+    if maintenance_service.last_report is None:
+        return {"message": "Maintenance has not run yet"}
+    return maintenance_service.last_report
+
+
+@router.post("/backup")
+def run_backup(
+    authenticated: bool = Depends(verify_token)
+):
+    """Take an online backup of the database with SQLite's backup API"""
+    try:
+        return backup_service.backup_database()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/backups")
+async def get_backups(
+    authenticated: bool = Depends(verify_token)
+):
+    """List stored backups and the report of the last one"""
+    return {"last_backup": backup_service.last_backup, "backups": backup_service.list_backups()}
+
+
+@router.get("/backups/{name}")
+async def download_backup(
+    name: str,
+    authenticated: bool = Depends(verify_token)
+):
+    """Download a stored backup"""
+    path = backup_service.backup_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Backup not found")
+    return FileResponse(path, media_type="application/vnd.sqlite3", filename=name)
@@ -1,13 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database import get_db
 from routers.auth import verify_token
 import models
 import schemas
+from serializers import NOTE_COLUMNS, note_rows, tag_rows
+from services.classifier_service import classifier, note_text, observe_note
+from services.event_service import publish
+from services.maintenance_service import attach_cold_content
 
 router = APIRouter(prefix="/notes", tags=["Notes"])
 
+VALID_CATEGORIES = ["工作能力", "AI技术", "投资", "个人提升"]
+
+
+def _feed_text(feed: models.Feed) -> str:
+    return note_text(
+        feed.translated_title or feed.title,
+        "\n".join(part for part in (feed.summary, feed.insight, feed.content) if part)
+    )
+
 
 @router.get("/", response_model=List[schemas.NoteResponse])
 async def get_notes(
@@ -19,18 +34,18 @@ async def get_notes(
     authenticated: bool = Depends(verify_token)
 ):
     """Get all notes with optional filtering"""
-    query = db.query(models.Note)
+    stmt = select(*NOTE_COLUMNS)
     
     if category:
-        query = query.filter(models.Note.category == category)
+        stmt = stmt.where(models.Note.category == category)
     
     if search:
-        query = query.filter(
+        stmt = stmt.where(
             (models.Note.title.contains(search)) | (models.Note.content.contains(search))
         )
     
-    notes = query.order_by(models.Note.updated_at.desc()).offset(skip).limit(limit).all()
-    return notes
+    stmt = stmt.order_by(models.Note.updated_at.desc()).offset(skip).limit(limit)
+    return ORJSONResponse(note_rows(db, stmt))
 
 
 @router.get("/{note_id}", response_model=schemas.NoteResponse)
@@ -56,11 +71,10 @@ async def create_note(
 ):
     """Create a new note"""
     # Validate category
-    valid_categories = ["工作能力", "AI技术", "投资", "个人提升"]
-    if note.category not in valid_categories:
+    if note.category not in VALID_CATEGORIES:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid category. Must be one of: {', '.join(valid_categories)}"
+            detail=f"Invalid category. Must be one of: {', '.join(VALID_CATEGORIES)}"
         )
     
     # Create note
@@ -92,6 +106,9 @@ async def create_note(
             feed.is_archived = True
             db.commit()
     
+    observe_note(db_note.title, db_note.content, db_note.category, [tag.name for tag in db_note.tags])
+    publish(db, "note.created", {"note_id": db_note.id, "feed_id": db_note.feed_id})
+    
     return db_note
 
 
@@ -108,17 +125,18 @@ async def update_note(
     if not db_note:
         raise HTTPException(status_code=404, detail="Note not found")
     
+    previous = (db_note.title, db_note.content, db_note.category, [tag.name for tag in db_note.tags])
+    
     # Update fields
     if note_update.title is not None:
         db_note.title = note_update.title
     if note_update.content is not None:
         db_note.content = note_update.content
     if note_update.category is not None:
-        valid_categories = ["工作能力", "AI技术", "投资", "个人提升"]
-        if note_update.category not in valid_categories:
+        if note_update.category not in VALID_CATEGORIES:
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid category. Must be one of: {', '.join(valid_categories)}"
+                detail=f"Invalid category. Must be one of: {', '.join(VALID_CATEGORIES)}"
             )
         db_note.category = note_update.category
     
@@ -135,6 +153,11 @@ async def update_note(
     db.commit()
     db.refresh(db_note)
     
+    observe_note(
+        db_note.title, db_note.content, db_note.category, [tag.name for tag in db_note.tags], previous=previous
+    )
+    publish(db, "note.updated", {"note_id": db_note.id})
+    
     return db_note
 
 
@@ -151,6 +174,7 @@ async def delete_note(
         raise HTTPException(status_code=404, detail="Note not found")
     
     db.delete(note)
+    publish(db, "note.deleted", {"note_id": note_id}, commit=False)
     db.commit()
     
     return {"message": "Note deleted successfully"}
@@ -171,11 +195,28 @@ async def get_categories(
     }
 
 
+@router.post("/suggest", response_model=schemas.NoteSuggestResponse)
+async def suggest_category_and_tags(
+    request: schemas.NoteSuggestRequest,
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_token)
+):
+    """Suggest a category and tags with the local classifier (no LLM call)"""
+    if request.feed_id:
+        feed = db.query(models.Feed).filter(models.Feed.id == request.feed_id).first()
+        if not feed:
+            raise HTTPException(status_code=404, detail="Feed not found")
+        text = _feed_text(attach_cold_content(feed, db))
+    else:
+        text = note_text(request.title, request.content)
+    
+    return classifier.predict(text)
+
+
 @router.get("/tags/list", response_model=List[schemas.TagResponse])
 async def get_tags(
     db: Session = Depends(get_db),
     authenticated: bool = Depends(verify_token)
 ):
     """Get all tags"""
-    tags = db.query(models.Tag).all()
-    return tags
+    return ORJSONResponse(tag_rows(db))
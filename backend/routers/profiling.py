@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
+from routers.auth import verify_token
+from services import profiling_service
+
+router = APIRouter(prefix="/profiling", tags=["Profiling"])
+
+
+@router.get("/profiles")
+async def get_profiles(
+    authenticated: bool = Depends(verify_token)
+):
+    """List saved request/job profiles, newest first"""
+    return profiling_service.list_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(
+    profile_id: str,
+    format: str = "prof",
+    sort: str = "cumulative",
+    limit: int = 60,
+    authenticated: bool = Depends(verify_token)
+):
+    """Download a profile (pstats file), or format=text for the top functions"""
+    path = profiling_service.profile_path(profile_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    if format == "text":
+        try:
+            return PlainTextResponse(profiling_service.profile_text(path, sort=sort, limit=limit))
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Unknown sort key: {sort}")
+    
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = 50,
+    authenticated: bool = Depends(verify_token)
+):
+    """Recent slow statements seen by this API process, newest first"""
+    entries = list(profiling_service.slow_queries)[-limit:]
+    return {"threshold_ms": profiling_service.settings.slow_query_ms, "queries": entries[::-1]}
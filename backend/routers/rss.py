@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from typing import List
 from database import get_db
 from routers.auth import verify_token
 import models
 import schemas
-from services.rss_service import fetch_rss_feeds, fetch_all_rss_sources, sync_sources_from_config
+from services.rss_service import sync_sources_from_config, normalize_source_url
+from services.snapshot_service import archive_stats
+from services.opml_service import build_opml, import_opml
+from config import get_settings
+from services.job_service import enqueue_job, enqueue_jobs, recently_finished
 
 router = APIRouter(prefix="/rss", tags=["RSS Sources"])
+settings = get_settings()
 
 
 @router.get("/sources", response_model=List[schemas.RSSSourceResponse])
@@ -28,9 +34,7 @@ async def create_rss_source(
 ):
     """Create a new RSS source"""
     # Convert rsshub:// protocol to https://rsshub.app/
-    url = source.url
-    if url.startswith('rsshub://'):
-        url = url.replace('rsshub://', 'https://rsshub.app/', 1)
+    url = normalize_source_url(source.url)
     
     # Check if source already exists
     existing = db.query(models.RSSSource).filter(
@@ -51,6 +55,46 @@ async def create_rss_source(
     return db_source
 
 
+@router.get("/sources/opml")
+async def export_opml(
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_token)
+):
+    """Export all RSS sources as OPML, grouped by category"""
+    return Response(
+        content=build_opml(db.query(models.RSSSource).all()),
+        media_type="text/x-opml",
+        headers={"Content-Disposition": 'attachment; filename="brain-sync-sources.opml"'}
+    )
+
+
+@router.post("/sources/opml")
+async def import_opml_file(
+    file: UploadFile = File(...),
+    validate: bool = True,
+    fetch: bool = False,
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_token)
+):
+    """
+    Import RSS sources from an OPML file.
+    
+    New URLs are validated in parallel (web pages are resolved to their
+    advertised feed) unless validate=false; fetch=true queues a fetch of
+    every created source. Returns a per-URL report.
+    """
+    try:
+        report = await import_opml(db, await file.read(), validate=validate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if fetch:
+        created_ids = [r["source_id"] for r in report["results"] if r["status"] == "created"]
+        report["job_ids"] = [job.id for job in enqueue_jobs(db, "fetch_source", created_ids)]
+    
+    return report
+
+
 @router.put("/sources/{source_id}", response_model=schemas.RSSSourceResponse)
 async def update_rss_source(
     source_id: int,
@@ -65,9 +109,7 @@ async def update_rss_source(
         raise HTTPException(status_code=404, detail="RSS source not found")
     
     # Convert rsshub:// protocol to https://rsshub.app/
-    url = source.url
-    if url.startswith('rsshub://'):
-        url = url.replace('rsshub://', 'https://rsshub.app/', 1)
+    url = normalize_source_url(source.url)
     
     # Update source fields
     db_source.name = source.name
@@ -103,19 +145,37 @@ async def fetch_all_feeds(
     db: Session = Depends(get_db),
     authenticated: bool = Depends(verify_token)
 ):
-    """Manually trigger fetching all RSS feeds"""
-    result = await fetch_all_rss_sources(db)
-    return result
+    """Queue a fetch job for every RSS source; workers do the fetching"""
+    source_ids = [row.id for row in db.query(models.RSSSource.id).all()]
+    
+    # Sources fetched within the cooldown window are skipped
+    cooling = recently_finished(db, "fetch_source", source_ids, settings.fetch_cooldown_seconds)
+    jobs = enqueue_jobs(db, "fetch_source", [i for i in source_ids if i not in cooling])
+    
+    return {
+        "message": f"Queued fetching of {len(jobs)} sources ({len(cooling)} fetched recently, skipped)",
+        "job_ids": [job.id for job in jobs]
+    }
+
+
+@router.get("/snapshots/stats")
+async def get_snapshot_stats(
+    db: Session = Depends(get_db),
+    authenticated: bool = Depends(verify_token)
+):
+    """Size of the raw feed snapshot archive used by `python -m replay`"""
+    return archive_stats(db)
 
 
 @router.post("/sources/sync-from-config")
 async def sync_sources(
+    force: bool = True,
     db: Session = Depends(get_db),
     authenticated: bool = Depends(verify_token)
 ):
     """Sync RSS sources from rss_source.yaml on the server"""
     try:
-        result = sync_sources_from_config(db)
+        result = sync_sources_from_config(db, force=force)
         return result
     except FileNotFoundError:
         raise HTTPException(status_code=500, detail="Config file rss_source.yaml not found on server")
@@ -129,11 +189,19 @@ async def fetch_source_feeds(
     db: Session = Depends(get_db),
     authenticated: bool = Depends(verify_token)
 ):
-    """Fetch feeds from a specific RSS source"""
+    """Queue fetching feeds from a specific RSS source"""
     source = db.query(models.RSSSource).filter(models.RSSSource.id == source_id).first()
     
     if not source:
         raise HTTPException(status_code=404, detail="RSS source not found")
     
-    new_feeds = await fetch_rss_feeds(source, db)
-    return {"message": f"Fetched {len(new_feeds)} new feeds"}
+    cooling = recently_finished(db, "fetch_source", [source.id], settings.fetch_cooldown_seconds)
+    if source.id in cooling:
+        raise HTTPException(
+            status_code=429,
+            detail="RSS source was fetched moments ago, try again later",
+            headers={"Retry-After": str(cooling[source.id])}
+        )
+    
+    job = enqueue_job(db, "fetch_source", source.id)
+    return {"message": "Fetch queued", "job_id": job.id}
@@ -5,5 +5,10 @@ if [ -d "venv" ]; then
     source venv/bin/activate
 fi
 
+# Run the ingest/analysis worker in the background
+python -m worker &
+WORKER_PID=$!
+trap "kill $WORKER_PID" EXIT
+
 # Run the FastAPI server
 uvicorn main:app --host 0.0.0.0 --port 8000 --reload
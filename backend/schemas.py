@@ -79,6 +79,25 @@ class NoteCreate(NoteBase):
     tag_names: Optional[List[str]] = []
 
 
+class NoteSuggestRequest(BaseModel):
+    title: Optional[str] = ""
+    content: Optional[str] = ""
+    feed_id: Optional[int] = None
+
+
+class TagSuggestion(BaseModel):
+    name: str
+    score: float
+
+
+class NoteSuggestResponse(BaseModel):
+    category: Optional[str] = None
+    category_scores: dict = {}
+    tags: List[TagSuggestion] = []
+    ready: bool
+    elapsed_ms: Optional[float] = None
+
+
 class NoteUpdate(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
@@ -0,0 +1,152 @@
+"""
+Fast serialization path for list endpoints.
+
+Rows are built straight from column tuples (no ORM identity map, no pydantic
+validation) and encoded with orjson via ORJSONResponse. The output matches
+schemas.FeedResponse / NoteResponse / TagResponse field for field.
+"""
+import zlib
+from collections import defaultdict
+from typing import Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+
+FEED_COLUMNS = (
+    models.Feed.id,
+    models.Feed.source_id,
+    models.Feed.title,
+    models.Feed.original_title,
+    models.Feed.link,
+    models.Feed.published_at,
+    models.Feed.content,
+    models.Feed.is_analyzed,
+    models.Feed.translated_title,
+    models.Feed.summary,
+    models.Feed.insight,
+    models.Feed.is_read,
+    models.Feed.is_archived,
+    models.Feed.created_at,
+)
+
+SOURCE_COLUMNS = (
+    models.RSSSource.id.label("s_id"),
+    models.RSSSource.name.label("s_name"),
+    models.RSSSource.url.label("s_url"),
+    models.RSSSource.type.label("s_type"),
+    models.RSSSource.category.label("s_category"),
+    models.RSSSource.created_at.label("s_created_at"),
+)
+
+NOTE_COLUMNS = (
+    models.Note.id,
+    models.Note.title,
+    models.Note.content,
+    models.Note.category,
+    models.Note.feed_id,
+    models.Note.original_link,
+    models.Note.created_at,
+    models.Note.updated_at,
+)
+
+TAG_COLUMNS = (models.Tag.id, models.Tag.name, models.Tag.created_at)
+
+
+def feed_list_statement():
+    """SELECT of feed columns plus the joined source, ready for filters"""
+    return select(*FEED_COLUMNS, *SOURCE_COLUMNS).outerjoin(
+        models.RSSSource, models.RSSSource.id == models.Feed.source_id
+    )
+
+
+def cold_contents(db: Session, feed_ids: Iterable[int]) -> dict:
+    """Decompressed content of compacted feeds, one query for the whole page"""
+    feed_ids = list(feed_ids)
+    if not feed_ids:
+        return {}
+    stmt = select(models.FeedColdContent.feed_id, models.FeedColdContent.content_gz).where(
+        models.FeedColdContent.feed_id.in_(feed_ids)
+    )
+    return {r.feed_id: zlib.decompress(r.content_gz).decode("utf-8") for r in db.execute(stmt)}
+
+
+def feed_rows(db: Session, stmt) -> List[dict]:
+    rows = []
+    for r in db.execute(stmt):
+        rows.append({
+            "title": r.title,
+            "link": r.link,
+            "id": r.id,
+            "source_id": r.source_id,
+            "original_title": r.original_title,
+            "published_at": r.published_at,
+            "content": r.content,
+            "is_analyzed": bool(r.is_analyzed),
+            "translated_title": r.translated_title,
+            "summary": r.summary,
+            "insight": r.insight,
+            "is_read": bool(r.is_read),
+            "is_archived": bool(r.is_archived),
+            "created_at": r.created_at,
+            "source": {
+                "name": r.s_name,
+                "url": r.s_url,
+                "type": r.s_type,
+                "category": r.s_category,
+                "id": r.s_id,
+                "created_at": r.s_created_at,
+            } if r.s_id is not None else None,
+        })
+
+    # Retention moves the content of old read feeds to feed_cold_content
+    cold = cold_contents(db, (row["id"] for row in rows if row["content"] is None))
+    for row in rows:
+        if row["id"] in cold:
+            row["content"] = cold[row["id"]]
+    return rows
+
+
+def tags_by_note(db: Session, note_ids: Iterable[int]) -> dict:
+    """Load tags for many notes with one query instead of one per note"""
+    note_ids = list(note_ids)
+    grouped = defaultdict(list)
+    if not note_ids:
+        return grouped
+
+    stmt = (
+        select(models.note_tags.c.note_id, *TAG_COLUMNS)
+        .join(models.Tag, models.Tag.id == models.note_tags.c.tag_id)
+        .where(models.note_tags.c.note_id.in_(note_ids))
+        .order_by(models.Tag.id)
+    )
+    for r in db.execute(stmt):
+        grouped[r.note_id].append({"name": r.name, "id": r.id, "created_at": r.created_at})
+    return grouped
+
+
+def note_rows(db: Session, stmt) -> List[dict]:
+    notes = db.execute(stmt).all()
+    tags = tags_by_note(db, (r.id for r in notes))
+    return [
+        {
+            "title": r.title,
+            "content": r.content,
+            "category": r.category,
+            "id": r.id,
+            "feed_id": r.feed_id,
+            "original_link": r.original_link,
+            "created_at": r.created_at,
+            "updated_at": r.updated_at,
+            "tags": tags.get(r.id, []),
+        }
+        for r in notes
+    ]
+
+
+def tag_rows(db: Session) -> List[dict]:
+    return [
+        {"name": r.name, "id": r.id, "created_at": r.created_at}
+        for r in db.execute(select(*TAG_COLUMNS))
+    ]
@@ -1,37 +1,45 @@
-from openai import OpenAI
+from functools import lru_cache
 from config import get_settings
 import models
 from sqlalchemy.orm import Session
+import time
+from services.extractive_service import extract, estimate_tokens
+from services.routing_service import choose_route
+from services.event_service import publish
+from services.job_service import ensure_lease
+from services.maintenance_service import attach_cold_content
 
 settings = get_settings()
 
-# Initialize Qwen client
-client = OpenAI(
-    api_key=settings.qwen_api_key,
-    base_url=settings.qwen_api_base,
-)
 
-
-async def analyze_feed_with_qwen(feed: models.Feed, db: Session) -> dict:
-    """
-    Use Qwen AI to analyze a feed item and generate:
-    1. Translated title (if English)
-    2. Core summary (3 key points)
-    3. Personal insight
-    """
+@lru_cache()
+def get_client():
+    """Create the Qwen client on first use; importing openai is slow"""
+    from openai import OpenAI
     
-    # Prepare prompt
-    prompt = f"""你是一个专业的知识助手,需要分析以下文章或播客内容,并按照特定格式输出:
+    return OpenAI(
+        api_key=settings.qwen_api_key,
+        base_url=settings.qwen_api_base,
+    )
 
-标题: {feed.title}
-内容: {feed.content[:2000] if feed.content else '暂无内容'}
-
-请按照以下格式输出:
 
-【标题翻译】
+TITLE_TRANSLATION_SECTION = """【标题翻译】
 如果原标题是英文,提供精准的中文翻译。如果已经是中文,直接复述原标题。
 
-【核心总结】
+"""
+
+
+def build_analysis_prompt(title: str, content: str, translate_title: bool = True) -> str:
+    # Titles already in Chinese skip the translation section entirely
+    title_section = TITLE_TRANSLATION_SECTION if translate_title else ""
+    return f"""你是一个专业的知识助手,需要分析以下文章或播客内容,并按照特定格式输出:
+
+标题: {title}
+内容: {content or '暂无内容'}
+
+请按照以下格式输出:
+
+{title_section}【核心总结】
 用3个要点提炼核心内容,每个要点一行,格式为:
 1. 第一个要点
 2. 第二个要点
@@ -42,53 +50,97 @@ async def analyze_feed_with_qwen(feed: models.Feed, db: Session) -> dict:
 
 请严格按照上述格式输出,不要添加其他内容。"""
 
+
+def parse_analysis(result: str) -> dict:
+    """Split the model output into its three 【】 sections"""
+    translated_title = ""
+    summary = ""
+    insight = ""
+    
+    lines = result.split('\n')
+    current_section = None
+    
+    for line in lines:
+        line = line.strip()
+        if '【标题翻译】' in line:
+            current_section = 'title'
+            continue
+        elif '【核心总结】' in line:
+            current_section = 'summary'
+            continue
+        elif '【专属见解】' in line:
+            current_section = 'insight'
+            continue
+        
+        if line:
+            if current_section == 'title':
+                translated_title += line + '\n'
+            elif current_section == 'summary':
+                summary += line + '\n'
+            elif current_section == 'insight':
+                insight += line + '\n'
+    
+    return {
+        "translated_title": translated_title.strip(),
+        "summary": summary.strip(),
+        "insight": insight.strip()
+    }
+
+
+async def analyze_feed_with_qwen(feed: models.Feed, db: Session) -> dict:
+    """
+    Use Qwen AI to analyze a feed item and generate:
+    1. Translated title (if English)
+    2. Core summary (3 key points)
+    3. Personal insight
+    
+    The content is first reduced to its most informative sentences locally
+    (see extractive_service) so the prompt stays within the token budget, and
+    the model is picked by routing_service.
+    """
+    
+    # Prepare prompt (compacted feeds keep their text in cold storage)
+    attach_cold_content(feed, db)
+    content, content_tokens = extract(feed.content or "", settings.analysis_content_token_budget)
+    decision = choose_route(feed.title, content_tokens)
+    prompt = build_analysis_prompt(feed.title, content, decision.translate_title)
+
     try:
-        response = client.chat.completions.create(
-            model="qwen-plus",
+        started = time.perf_counter()
+        response = get_client().chat.completions.create(
+            model=decision.model,
             messages=[
                 {"role": "system", "content": "你是一个专业的知识管理助手,擅长分析和提炼信息。"},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=1000
+            max_tokens=decision.max_tokens
         )
+        latency_ms = int((time.perf_counter() - started) * 1000)
         
-        result = response.choices[0].message.content
-        
-        # Parse the result
-        translated_title = ""
-        summary = ""
-        insight = ""
-        
-        lines = result.split('\n')
-        current_section = None
-        
-        for line in lines:
-            line = line.strip()
-            if '【标题翻译】' in line:
-                current_section = 'title'
-                continue
-            elif '【核心总结】' in line:
-                current_section = 'summary'
-                continue
-            elif '【专属见解】' in line:
-                current_section = 'insight'
-                continue
-            
-            if line:
-                if current_section == 'title':
-                    translated_title += line + '\n'
-                elif current_section == 'summary':
-                    summary += line + '\n'
-                elif current_section == 'insight':
-                    insight += line + '\n'
+        analysis = parse_analysis(response.choices[0].message.content)
         
         # Update feed with analysis
         feed.is_analyzed = True
-        feed.translated_title = translated_title.strip()
-        feed.summary = summary.strip()
-        feed.insight = insight.strip()
+        feed.translated_title = analysis["translated_title"] or feed.title
+        feed.summary = analysis["summary"]
+        feed.insight = analysis["insight"]
+        
+        usage = getattr(response, "usage", None)
+        db.add(models.AnalysisLog(
+            feed_id=feed.id,
+            content_tokens_prefix=estimate_tokens((feed.content or "")[:2000]),
+            content_tokens_sent=content_tokens,
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None),
+            route=decision.route,
+            model=decision.model,
+            language=decision.language,
+            latency_ms=latency_ms,
+        ))
+        publish(db, "feed.analyzed", {"feed_id": feed.id, **analysis}, commit=False)
         
+        ensure_lease()
         db.commit()
         db.refresh(feed)
         
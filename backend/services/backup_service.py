@@ -0,0 +1,134 @@
+"""
+Online backups with SQLite's backup API.
+
+Pages are copied `backup_pages_per_step` at a time with a short pause after
+each step, so API and worker writers keep getting the write lock while a
+backup runs. The copy goes to a temporary file that is renamed into place
+only once it is complete, and the newest `backup_keep` files are kept.
+"""
+import asyncio
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from config import get_settings
+from database import engine
+from services.job_service import claim_periodic
+
+settings = get_settings()
+
+BACKUP_PREFIX = "brain_sync-"
+BACKUP_SUFFIX = ".db"
+
+# Last backup report, exposed through GET /maintenance/backups
+last_backup: Optional[dict] = None
+
+
+def _backup_dir() -> str:
+    os.makedirs(settings.backup_dir, exist_ok=True)
+    return settings.backup_dir
+
+
+def list_backups() -> List[dict]:
+    """Completed backups, newest first"""
+    if not os.path.isdir(settings.backup_dir):
+        return []
+    backups = []
+    for name in os.listdir(settings.backup_dir):
+        if name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX):
+            stat = os.stat(os.path.join(settings.backup_dir, name))
+            backups.append({
+                "name": name,
+                "size": stat.st_size,
+                "created_at": datetime.utcfromtimestamp(stat.st_mtime).isoformat(),
+            })
+    return sorted(backups, key=lambda b: b["name"], reverse=True)
+
+
+def backup_path(name: str) -> Optional[str]:
+    """Path of an existing backup by file name, refusing anything outside backup_dir"""
+    if os.path.basename(name) != name or not name.startswith(BACKUP_PREFIX) or not name.endswith(BACKUP_SUFFIX):
+        return None  # also keeps in-progress .partial files out
+    path = os.path.join(settings.backup_dir, name)
+    return path if os.path.isfile(path) else None
+
+
+def _prune_backups(keep: int) -> List[str]:
+    removed = []
+    for backup in list_backups()[keep:]:
+        os.remove(os.path.join(settings.backup_dir, backup["name"]))
+        removed.append(backup["name"])
+    return removed
+
+
+def backup_database(pages_per_step: int = None) -> dict:
+    """Copy the live database into backup_dir without blocking writers"""
+    global last_backup
+
+    if engine.dialect.name != "sqlite":
+        raise ValueError(f"Online backup is not supported for {engine.dialect.name}")
+
+    pages_per_step = pages_per_step or settings.backup_pages_per_step
+    pause = settings.backup_step_pause_seconds
+    # Microseconds keep names sortable and apart for back-to-back backups;
+    # creating the temp file exclusively catches any remaining collision
+    name = f"{BACKUP_PREFIX}{datetime.utcnow().strftime('%Y%m%d-%H%M%S-%f')}{BACKUP_SUFFIX}"
+    path = os.path.join(_backup_dir(), name)
+    tmp_path = path + ".partial"
+
+    steps = 0
+
+    def progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        if remaining and pause > 0:
+            time.sleep(pause)  # let writers in between steps
+
+    started = time.perf_counter()
+    source = engine.raw_connection()
+    try:
+        open(tmp_path, "x").close()
+    except OSError:
+        source.close()
+        raise
+    target = sqlite3.connect(tmp_path)
+    try:
+        source.driver_connection.backup(target, pages=pages_per_step, progress=progress)
+    except Exception:
+        target.close()
+        os.remove(tmp_path)
+        raise
+    finally:
+        source.close()
+    target.close()
+    os.replace(tmp_path, path)
+
+    last_backup = {
+        "name": name,
+        "size": os.path.getsize(path),
+        "steps": steps,
+        "pages_per_step": pages_per_step,
+        "duration_seconds": round(time.perf_counter() - started, 3),
+        "finished_at": datetime.utcnow().isoformat(),
+        "removed": _prune_backups(settings.backup_keep),
+    }
+    return last_backup
+
+
+async def backup_loop():
+    """Background task started from main.lifespan"""
+    interval_hours = settings.backup_interval_hours
+    if interval_hours <= 0:
+        return
+
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            if not await asyncio.to_thread(claim_periodic, "backup", interval_hours * 3600):
+                continue  # another process took this run
+            report = await asyncio.to_thread(backup_database)
+            print(f"💾 Backup finished: {report}")
+        except Exception as e:
+            print(f"⚠️ Backup failed: {e}")
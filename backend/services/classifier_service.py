@@ -0,0 +1,238 @@
+"""
+Local note category and tag suggestion.
+
+A linear model over hashed text features (see extractive_service.hashed_features):
+softmax regression for the category, one-vs-rest logistic regression for the
+most used tags. It is trained in NumPy on existing notes, nudged with one SGD
+step whenever a note is saved, and fully retrained in a background thread
+after every `classifier_retrain_every` saves. Prediction only touches the
+weight rows of the features present, so it takes well under a millisecond.
+"""
+import threading
+import time
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import SessionLocal
+import models
+from serializers import tags_by_note
+from services.extractive_service import hashed_features
+
+settings = get_settings()
+
+FEATURE_DIM = 1 << 11
+MAX_TAGS = 200  # tag vocabulary: most used tags with at least MIN_TAG_NOTES notes
+MIN_TAG_NOTES = 2
+MAX_TRAINING_NOTES = 3000  # most recent notes used for a full retrain
+EPOCHS = 60
+LEARNING_RATE = 1.0
+ONLINE_LEARNING_RATE = 0.3
+L2 = 1e-4
+TEXT_CHARS = 4000  # only the start of long notes is featurized
+TAG_THRESHOLD = 0.4
+MAX_SUGGESTED_TAGS = 5
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def vectorize(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Sparse (indices, values): log-scaled, L2-normalized hashed term counts"""
+    features = hashed_features((text or "")[:TEXT_CHARS], FEATURE_DIM)
+    if not features:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    idx, counts = np.unique(np.asarray(features, dtype=np.int64), return_counts=True)
+    values = np.log1p(counts).astype(np.float32)
+    return idx, values / np.linalg.norm(values)
+
+
+def note_text(title: str, content: str) -> str:
+    return f"{title or ''}\n{content or ''}"
+
+
+class NoteClassifier:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._retrain_lock = threading.Lock()
+        self.categories: List[str] = []
+        self.tags: List[str] = []
+        self.w_cat: Optional[np.ndarray] = None  # (FEATURE_DIM, categories)
+        self.b_cat: Optional[np.ndarray] = None
+        self.w_tag: Optional[np.ndarray] = None  # (FEATURE_DIM, tags)
+        self.b_tag: Optional[np.ndarray] = None
+        self.trained_on = 0
+        self.trained_at: Optional[float] = None
+        self.updates_since_training = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.w_cat is not None
+
+    def fit(self, samples: List[Tuple[str, str, List[str]]]):
+        """Full batch training on (text, category, tag_names) samples"""
+        categories = sorted({category for _, category, _ in samples if category})
+        tag_counts = Counter(tag for _, _, tags in samples for tag in set(tags))
+        tags = [tag for tag, n in tag_counts.most_common(MAX_TAGS) if n >= MIN_TAG_NOTES]
+        if not categories:
+            return
+
+        n = len(samples)
+        x = np.zeros((n, FEATURE_DIM), dtype=np.float32)
+        y_cat = np.zeros((n, len(categories)), dtype=np.float32)
+        y_tag = np.zeros((n, len(tags)), dtype=np.float32)
+        cat_index = {c: i for i, c in enumerate(categories)}
+        tag_index = {t: i for i, t in enumerate(tags)}
+
+        for row, (text, category, note_tags) in enumerate(samples):
+            idx, values = vectorize(text)
+            x[row, idx] = values
+            if category in cat_index:
+                y_cat[row, cat_index[category]] = 1.0
+            for tag in note_tags:
+                if tag in tag_index:
+                    y_tag[row, tag_index[tag]] = 1.0
+
+        w_cat = np.zeros((FEATURE_DIM, len(categories)), dtype=np.float32)
+        b_cat = np.zeros(len(categories), dtype=np.float32)
+        w_tag = np.zeros((FEATURE_DIM, len(tags)), dtype=np.float32)
+        b_tag = np.zeros(len(tags), dtype=np.float32)
+
+        for _ in range(EPOCHS):
+            grad = (_softmax(x @ w_cat + b_cat) - y_cat) / n
+            w_cat -= LEARNING_RATE * (x.T @ grad + L2 * w_cat)
+            b_cat -= LEARNING_RATE * grad.sum(axis=0)
+            if tags:
+                grad = (_sigmoid(x @ w_tag + b_tag) - y_tag) / n
+                w_tag -= LEARNING_RATE * (x.T @ grad + L2 * w_tag)
+                b_tag -= LEARNING_RATE * grad.sum(axis=0)
+
+        with self._lock:
+            self.categories, self.tags = categories, tags
+            self.w_cat, self.b_cat, self.w_tag, self.b_tag = w_cat, b_cat, w_tag, b_tag
+            self.trained_on = n
+            self.trained_at = time.time()
+            self.updates_since_training = 0
+
+    def partial_fit(self, text: str, category: str, note_tags: List[str], rate: float = ONLINE_LEARNING_RATE):
+        """One SGD step for a newly saved note; unseen labels wait for the next retrain
+
+        A negative rate steps the other way, backing out an earlier step on the
+        same labels (see observe_note).
+        """
+        with self._lock:
+            self.updates_since_training += 1
+            if not self.ready:
+                return
+            idx, values = vectorize(text)
+            if idx.size == 0:
+                return
+
+            if category in self.categories:
+                target = np.zeros(len(self.categories), dtype=np.float32)
+                target[self.categories.index(category)] = 1.0
+                grad = _softmax(values @ self.w_cat[idx] + self.b_cat) - target
+                self.w_cat[idx] -= rate * np.outer(values, grad)
+                self.b_cat -= rate * grad
+
+            if self.tags:
+                target = np.array([1.0 if tag in note_tags else 0.0 for tag in self.tags], dtype=np.float32)
+                grad = _sigmoid(values @ self.w_tag[idx] + self.b_tag) - target
+                self.w_tag[idx] -= rate * np.outer(values, grad)
+                self.b_tag -= rate * grad
+
+    def predict(self, text: str) -> dict:
+        started = time.perf_counter()
+        with self._lock:
+            if not self.ready:
+                return {"category": None, "category_scores": {}, "tags": [], "ready": False}
+
+            idx, values = vectorize(text)
+            category_probs = _softmax(values @ self.w_cat[idx] + self.b_cat)
+            tag_probs = _sigmoid(values @ self.w_tag[idx] + self.b_tag) if self.tags else np.zeros(0)
+            categories, tags = self.categories, self.tags
+
+        best_tags = [
+            {"name": tags[i], "score": round(float(tag_probs[i]), 3)}
+            for i in np.argsort(-tag_probs)[:MAX_SUGGESTED_TAGS]
+            if tag_probs[i] >= TAG_THRESHOLD
+        ]
+        return {
+            "category": categories[int(np.argmax(category_probs))],
+            "category_scores": {c: round(float(p), 3) for c, p in zip(categories, category_probs)},
+            "tags": best_tags,
+            "ready": True,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+
+classifier = NoteClassifier()
+
+
+def load_training_samples(db: Session) -> List[Tuple[str, str, List[str]]]:
+    notes = db.query(models.Note.id, models.Note.title, models.Note.content, models.Note.category).order_by(
+        models.Note.id.desc()
+    ).limit(MAX_TRAINING_NOTES).all()
+    tags = tags_by_note(db, (note.id for note in notes))
+    return [
+        (note_text(note.title, note.content), note.category, [t["name"] for t in tags.get(note.id, [])])
+        for note in notes
+    ]
+
+
+def retrain():
+    """Retrain from the database; concurrent requests collapse into one run"""
+    if not classifier._retrain_lock.acquire(blocking=False):
+        return
+    try:
+        db = SessionLocal()
+        try:
+            samples = load_training_samples(db)
+        finally:
+            db.close()
+        if samples:
+            classifier.fit(samples)
+            print(f"🏷️ Note classifier trained on {len(samples)} notes")
+    except Exception as e:
+        print(f"⚠️ Note classifier training failed: {e}")
+    finally:
+        classifier._retrain_lock.release()
+
+
+def retrain_in_background():
+    threading.Thread(target=retrain, daemon=True).start()
+
+
+def observe_note(
+    title: str,
+    content: str,
+    category: str,
+    tag_names: List[str],
+    previous: Optional[Tuple[str, str, str, List[str]]] = None,
+):
+    """Learn from a saved note and schedule a retrain once enough have accumulated
+
+    previous is (title, content, category, tag_names) of an edited note before
+    the edit. Edits that keep the labels teach nothing and are skipped; a
+    relabel first backs out what the old labels taught.
+    """
+    if previous is not None:
+        old_title, old_content, old_category, old_tags = previous
+        if old_category == category and set(old_tags) == set(tag_names or []):
+            return
+        classifier.partial_fit(
+            note_text(old_title, old_content), old_category, old_tags, rate=-ONLINE_LEARNING_RATE
+        )
+    classifier.partial_fit(note_text(title, content), category, tag_names or [])
+    if not classifier.ready or classifier.updates_since_training >= settings.classifier_retrain_every:
+        retrain_in_background()
@@ -0,0 +1,381 @@
+"""
+Daily/weekly digests per source category.
+
+A digest is built by map-reduce so no prompt exceeds
+`digest_prompt_token_budget`:
+
+- map: the period's feeds are packed into batches that fit the budget, each
+  feed represented by its stored summary/insight (or a local extract if it
+  hasn't been analyzed), and every batch is summarized into a DigestChunk.
+- reduce: chunk summaries are packed and summarized again, level by level,
+  until one prompt holds them all; that last call writes the digest.
+
+Chunks remember which feeds they cover, so a refresh only maps feeds that
+arrived since the last build and then re-runs the (small) reduce. The result
+is stored on the Digest row, so reading a digest is one indexed query.
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import SessionLocal, insert_ignoring_conflicts
+import models
+from services.ai_service import get_client
+from services.event_service import publish
+from services.extractive_service import estimate_tokens, extract
+from services.job_service import claim_periodic, enqueue_jobs, ensure_lease
+
+settings = get_settings()
+
+PERIODS = ("daily", "weekly")
+PERIOD_LABELS = {"daily": "今日", "weekly": "本周"}
+BACKFILL_GRACE = timedelta(days=2)  # older entries pulled in by a first fetch are left out
+PROMPT_OVERHEAD_TOKENS = 250
+MAP_MAX_TOKENS = 500
+FINAL_MAX_TOKENS = 800
+ID_BATCH = 500
+
+SYSTEM_PROMPT = "你是一个专业的知识管理助手,擅长分析和提炼信息。"
+
+MAP_PROMPT = """以下是「{category}」类别中 {count} 篇文章的标题、要点和见解:
+
+{items}
+
+请合并成一份简洁的要点摘要:
+- 按主题归类,每个主题一行,格式为 "- 主题: 要点 (相关文章标题)"
+- 保留关键数字和结论,去掉重复内容
+- 不超过 400 字
+
+只输出摘要内容。"""
+
+REDUCE_PROMPT = """以下是「{category}」类别的几份要点摘要:
+
+{items}
+
+请把它们合并成一份要点摘要,格式不变 ("- 主题: 要点 (相关文章标题)"),合并相同主题,不超过 400 字。只输出摘要内容。"""
+
+FINAL_PROMPT = """以下是「{category}」类别{label} ({start} ~ {end}) 共 {count} 篇文章的要点摘要:
+
+{items}
+
+请输出{label}简报,严格按照以下格式:
+
+【{label}要点】
+3到7条最重要的内容,每条一行,格式为 "1. 要点 (相关文章标题)"
+
+【趋势与见解】
+结合用户的知识领域(工作能力、AI技术、投资、个人提升),用一到两句话点评整体趋势。"""
+
+
+def local_today() -> date:
+    return (datetime.utcnow() + timedelta(hours=settings.digest_utc_offset_hours)).date()
+
+
+def period_bounds(period: str, day: date) -> Tuple[datetime, datetime]:
+    """UTC [start, end) of the local day, or of the local week (Monday first), containing `day`"""
+    if period == "daily":
+        first, length = day, timedelta(days=1)
+    elif period == "weekly":
+        first, length = day - timedelta(days=day.weekday()), timedelta(days=7)
+    else:
+        raise ValueError(f"Unknown digest period: {period}")
+    start = datetime(first.year, first.month, first.day) - timedelta(hours=settings.digest_utc_offset_hours)
+    return start, start + length
+
+
+def digest_to_dict(digest: models.Digest) -> dict:
+    offset = timedelta(hours=settings.digest_utc_offset_hours)
+    return {
+        "id": digest.id,
+        "period": digest.period,
+        "date": (digest.period_start + offset).date().isoformat(),
+        "period_start": digest.period_start,
+        "period_end": digest.period_end,
+        "category": digest.category,
+        "content": digest.content,
+        "feed_count": digest.feed_count,
+        "chunk_count": digest.chunk_count,
+        "status": digest.status,
+        "built_at": digest.built_at,
+    }
+
+
+def _category_column():
+    return func.coalesce(models.RSSSource.category, "")
+
+
+def _period_feeds(db: Session, columns, start: datetime, end: datetime):
+    return (
+        db.query(*columns)
+        .select_from(models.Feed)
+        .join(models.RSSSource, models.RSSSource.id == models.Feed.source_id)
+        .filter(
+            models.Feed.created_at >= start,
+            models.Feed.created_at < end,
+            or_(models.Feed.published_at.is_(None), models.Feed.published_at >= start - BACKFILL_GRACE),
+        )
+    )
+
+
+def ensure_digests(db: Session, period: str, day: date) -> List[models.Digest]:
+    """Digest rows for every category that has feeds in the period, created if missing"""
+    start, end = period_bounds(period, day)
+    categories = [
+        category for (category,) in
+        _period_feeds(db, [_category_column()], start, end).distinct()
+    ]
+    for category in categories:
+        db.execute(
+            insert_ignoring_conflicts(models.Digest)
+            .values(
+                period=period,
+                period_start=start,
+                period_end=end,
+                category=category,
+                feed_count=0,
+                chunk_count=0,
+                status="pending",
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing()
+        )
+    db.commit()
+    return db.query(models.Digest).filter(
+        models.Digest.period == period,
+        models.Digest.period_start == start,
+    ).all()
+
+
+def schedule_refresh(db: Session, periods: Iterable[str] = PERIODS) -> List[models.Job]:
+    """
+    Queue build_digest jobs for the current and previous day/week, but only
+    for digests that have feeds they don't cover yet.
+    """
+    today = local_today()
+    digest_ids = []
+    for period in periods:
+        previous = today - timedelta(days=1 if period == "daily" else 7)
+        for day in (previous, today):
+            start, end = period_bounds(period, day)
+            counts = dict(
+                _period_feeds(db, [_category_column(), func.count(models.Feed.id)], start, end)
+                .group_by(_category_column())
+                .all()
+            )
+            for digest in ensure_digests(db, period, day):
+                if counts.get(digest.category, 0) > (digest.feed_count or 0) or digest.status != "ready":
+                    digest_ids.append(digest.id)
+    return enqueue_jobs(db, "build_digest", digest_ids)
+
+
+def _feed_item(row) -> str:
+    """One feed as map input: title plus its stored analysis, or a local extract"""
+    title = row.translated_title or row.title
+    budget = max(settings.digest_item_tokens - estimate_tokens(title), 30)
+    if row.summary or row.insight:
+        body = row.summary or ""
+        if row.insight:
+            body += f"\n见解: {row.insight}"
+    else:
+        body = row.content or ""
+    if estimate_tokens(body) > budget or not (row.summary or row.insight):
+        body, _ = extract(body, budget)
+    return f"### {title}\n{body}".strip()
+
+
+def _pack(texts: List[str], budget: int) -> List[List[int]]:
+    """Greedy in-order grouping of text indexes so each group fits the budget"""
+    groups, current, used = [], [], 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if current and used + cost > budget:
+            groups.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += cost
+    if current:
+        groups.append(current)
+    return groups
+
+
+def _complete(prompt: str, max_tokens: int) -> Tuple[str, dict]:
+    model = settings.digest_model or settings.qwen_model
+    started = time.perf_counter()
+    response = get_client().chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.3,
+        max_tokens=max_tokens,
+    )
+    usage = getattr(response, "usage", None)
+    return response.choices[0].message.content.strip(), {
+        "content_tokens_sent": estimate_tokens(prompt),
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "model": model,
+        "latency_ms": int((time.perf_counter() - started) * 1000),
+    }
+
+
+def _complete_all(prompts: List[str], max_tokens: int, route: str, db: Session) -> List[str]:
+    """Run prompts in parallel and log each call like feed analyses are logged"""
+    with ThreadPoolExecutor(max_workers=max(settings.digest_llm_concurrency, 1)) as pool:
+        results = list(pool.map(lambda p: _complete(p, max_tokens), prompts))
+    for _, log in results:
+        db.add(models.AnalysisLog(route=route, **log))
+    return [text for text, _ in results]
+
+
+def _load_feed_rows(db: Session, feed_ids: List[int]) -> List:
+    rows = []
+    columns = (
+        models.Feed.id,
+        models.Feed.title,
+        models.Feed.translated_title,
+        models.Feed.summary,
+        models.Feed.insight,
+        models.Feed.content,
+    )
+    for i in range(0, len(feed_ids), ID_BATCH):
+        rows.extend(
+            db.query(*columns).filter(models.Feed.id.in_(feed_ids[i:i + ID_BATCH])).all()
+        )
+    return sorted(rows, key=lambda r: r.id)
+
+
+def _map_new_feeds(db: Session, digest: models.Digest, feed_ids: List[int], available: int) -> int:
+    items = [_feed_item(row) for row in _load_feed_rows(db, feed_ids)]
+    ids = sorted(feed_ids)
+    groups = _pack(items, available)
+    prompts = [
+        MAP_PROMPT.format(
+            category=digest.category or "未分类",
+            count=len(group),
+            items="\n\n".join(items[i] for i in group),
+        )
+        for group in groups
+    ]
+    summaries = _complete_all(prompts, MAP_MAX_TOKENS, "digest-map", db)
+    for group, summary in zip(groups, summaries):
+        db.add(models.DigestChunk(
+            digest_id=digest.id,
+            feed_ids=json.dumps([ids[i] for i in group]),
+            summary=summary,
+        ))
+    # Map results are kept even if the reduce below fails; a retry reuses them
+    ensure_lease()
+    db.commit()
+    return len(groups)
+
+
+def _reduce(db: Session, digest: models.Digest, texts: List[str], feed_count: int, available: int) -> str:
+    category = digest.category or "未分类"
+    label = PERIOD_LABELS[digest.period]
+    offset = timedelta(hours=settings.digest_utc_offset_hours)
+    while True:
+        groups = _pack(texts, available)
+        if len(groups) == 1:
+            prompt = FINAL_PROMPT.format(
+                category=category,
+                label=label,
+                start=(digest.period_start + offset).date().isoformat(),
+                end=(digest.period_end + offset - timedelta(days=1)).date().isoformat(),
+                count=feed_count,
+                items="\n\n".join(texts),
+            )
+            return _complete_all([prompt], FINAL_MAX_TOKENS, "digest-final", db)[0]
+        if len(groups) == len(texts):
+            # Every text fills a prompt on its own; clip so pairs fit
+            texts = [extract(text, available // 2)[0] for text in texts]
+            continue
+        prompts = [
+            REDUCE_PROMPT.format(category=category, items="\n\n".join(texts[i] for i in group))
+            for group in groups
+        ]
+        texts = _complete_all(prompts, MAP_MAX_TOKENS, "digest-reduce", db)
+
+
+def build_digest(db: Session, digest_id: int) -> dict:
+    """Bring one digest up to date, summarizing only feeds no chunk covers yet"""
+    digest = db.query(models.Digest).filter(models.Digest.id == digest_id).first()
+    if not digest:
+        raise ValueError("Digest not found")
+
+    chunks = db.query(models.DigestChunk).filter(models.DigestChunk.digest_id == digest.id).all()
+    covered = {feed_id for chunk in chunks for feed_id in json.loads(chunk.feed_ids)}
+    period_ids = [
+        feed_id for (feed_id,) in
+        _period_feeds(db, [models.Feed.id], digest.period_start, digest.period_end)
+        .filter(_category_column() == digest.category)
+    ]
+    new_ids = [feed_id for feed_id in period_ids if feed_id not in covered]
+
+    if not new_ids and digest.status == "ready":
+        return {"message": "Digest is up to date", "digest_id": digest.id, "new_feeds": 0}
+    if not new_ids and not chunks:
+        return {"message": "No feeds in this period", "digest_id": digest.id, "new_feeds": 0}
+
+    available = settings.digest_prompt_token_budget - PROMPT_OVERHEAD_TOKENS
+    mapped = _map_new_feeds(db, digest, new_ids, available) if new_ids else 0
+
+    chunks = db.query(models.DigestChunk).filter(
+        models.DigestChunk.digest_id == digest.id
+    ).order_by(models.DigestChunk.id).all()
+    feed_count = len(covered) + len(new_ids)
+
+    digest.content = _reduce(db, digest, [chunk.summary for chunk in chunks], feed_count, available)
+    digest.feed_count = feed_count
+    digest.chunk_count = len(chunks)
+    digest.status = "ready"
+    digest.built_at = datetime.utcnow()
+    publish(db, "digest.updated", {
+        "digest_id": digest.id,
+        "period": digest.period,
+        "category": digest.category,
+    }, commit=False)
+    ensure_lease()
+    db.commit()
+
+    return {
+        "message": f"Digest rebuilt with {len(new_ids)} new feeds",
+        "digest_id": digest.id,
+        "new_feeds": len(new_ids),
+        "new_chunks": mapped,
+        "feed_count": feed_count,
+    }
+
+
+def _schedule_in_session() -> int:
+    db = SessionLocal()
+    try:
+        return len(schedule_refresh(db))
+    finally:
+        db.close()
+
+
+async def digest_loop():
+    """Background task started from main.lifespan; workers do the building"""
+    interval_hours = settings.digest_refresh_interval_hours
+    if interval_hours <= 0:
+        return
+
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            if not await asyncio.to_thread(claim_periodic, "digest_refresh", interval_hours * 3600):
+                continue  # another process took this run
+            queued = await asyncio.to_thread(_schedule_in_session)
+            if queued:
+                print(f"📰 Queued {queued} digest refreshes")
+        except Exception as e:
+            print(f"⚠️ Digest scheduling failed: {e}")
@@ -0,0 +1,112 @@
+"""
+Push notifications for clients.
+
+Producers (API handlers and worker processes) append rows to the events
+table. Every API process runs one EventBroker that polls the table and fans
+new events out to its connected SSE clients, so events reach clients no
+matter which process or host produced them. Each client has a bounded
+queue; a client that falls behind gets a single `resync` event instead of
+unbounded buffering, and should reload its data.
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import SessionLocal
+import models
+
+settings = get_settings()
+
+POLL_BATCH = 500
+
+
+def publish(db: Session, event_type: str, payload: dict, commit: bool = True):
+    """Record an event; with commit=False it is sent with the caller's transaction"""
+    db.add(models.Event(type=event_type, payload=json.dumps(payload, ensure_ascii=False, default=str)))
+    if commit:
+        db.commit()
+
+
+def event_to_dict(event: models.Event) -> dict:
+    return {"id": event.id, "type": event.type, "data": json.loads(event.payload or "null")}
+
+
+def events_since(db: Session, last_id: int, limit: int = POLL_BATCH) -> List[dict]:
+    events = db.query(models.Event).filter(models.Event.id > last_id).order_by(models.Event.id).limit(limit).all()
+    return [event_to_dict(event) for event in events]
+
+
+def prune_events(db: Session) -> int:
+    cutoff = datetime.utcnow() - timedelta(hours=settings.event_retention_hours)
+    deleted = db.query(models.Event).filter(models.Event.created_at < cutoff).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+class Subscriber:
+    def __init__(self, buffer: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+        self.lagged = False
+
+    def offer(self, event: dict):
+        if self.lagged:
+            if not self.queue.empty():
+                return
+            self.lagged = False  # the client has consumed the resync marker
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop the backlog; the client reloads instead of replaying it
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"id": event["id"], "type": "resync", "data": None})
+            self.lagged = True
+
+
+class EventBroker:
+    def __init__(self):
+        self.subscribers: Set[Subscriber] = set()
+        self.last_id: Optional[int] = None
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(settings.event_client_buffer)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def _poll(self) -> List[dict]:
+        db = SessionLocal()
+        try:
+            if self.last_id is None:
+                latest = db.query(models.Event.id).order_by(models.Event.id.desc()).first()
+                self.last_id = latest.id if latest else 0
+                return []
+            return events_since(db, self.last_id)
+        finally:
+            db.close()
+
+    async def run(self):
+        """Poll loop started from main.lifespan; idle while nobody is connected"""
+        while True:
+            await asyncio.sleep(settings.event_poll_interval_seconds)
+            if not self.subscribers:
+                self.last_id = None  # start from "now" when someone connects
+                continue
+            try:
+                events = await asyncio.to_thread(self._poll)
+            except Exception as e:
+                print(f"⚠️ Event poll failed: {e}")
+                continue
+            for event in events:
+                self.last_id = event["id"]
+                for subscriber in list(self.subscribers):
+                    subscriber.offer(event)
+
+
+broker = EventBroker()
@@ -0,0 +1,271 @@
+"""
+Streaming export of notes and feeds.
+
+Rows are read in keyset pages of PAGE_SIZE inside one read transaction, so
+the export is a consistent snapshot while memory stays flat no matter how
+large the database is. Output is produced chunk by chunk for a
+StreamingResponse: NDJSON (one JSON object per line) or a zip of Markdown
+files written to a non-seekable stream.
+"""
+import re
+import zipfile
+import zlib
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal, engine
+import models
+from serializers import tags_by_note
+
+PAGE_SIZE = 200
+ZIP_CHUNK_BYTES = 64 * 1024  # buffered zip output before it is sent
+EXPORT_KINDS = ("notes", "feeds")
+
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+def _begin_snapshot(db: Session):
+    # pysqlite doesn't open a transaction for SELECTs; without one every page
+    # would see a different state of the database. In WAL mode this read
+    # transaction doesn't block writers.
+    if engine.dialect.name == "sqlite":
+        db.connection().exec_driver_sql("BEGIN")
+
+
+def iter_notes(db: Session) -> Iterator[dict]:
+    """Notes with tag names and the link/title of the feed they were saved from"""
+    stmt = (
+        select(
+            models.Note.id,
+            models.Note.title,
+            models.Note.content,
+            models.Note.category,
+            models.Note.feed_id,
+            models.Note.original_link,
+            models.Note.created_at,
+            models.Note.updated_at,
+            models.Feed.link.label("feed_link"),
+            models.Feed.title.label("feed_title"),
+        )
+        .outerjoin(models.Feed, models.Feed.id == models.Note.feed_id)
+        .order_by(models.Note.id)
+        .limit(PAGE_SIZE)
+    )
+    last_id = 0
+    while True:
+        rows = db.execute(stmt.where(models.Note.id > last_id)).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        tags = tags_by_note(db, (r.id for r in rows))
+        for r in rows:
+            yield {
+                "id": r.id,
+                "title": r.title,
+                "content": r.content,
+                "category": r.category,
+                "tags": [tag["name"] for tag in tags.get(r.id, [])],
+                "feed_id": r.feed_id,
+                "original_link": r.original_link,
+                "feed_link": r.feed_link,
+                "feed_title": r.feed_title,
+                "created_at": r.created_at,
+                "updated_at": r.updated_at,
+            }
+
+
+def iter_feeds(db: Session) -> Iterator[dict]:
+    """Feeds with their source; compacted content is restored from the cold table"""
+    stmt = (
+        select(
+            models.Feed.id,
+            models.Feed.source_id,
+            models.Feed.title,
+            models.Feed.original_title,
+            models.Feed.translated_title,
+            models.Feed.link,
+            models.Feed.published_at,
+            models.Feed.content,
+            models.Feed.summary,
+            models.Feed.insight,
+            models.Feed.is_read,
+            models.Feed.is_archived,
+            models.Feed.created_at,
+            models.RSSSource.name.label("source_name"),
+            models.RSSSource.category.label("source_category"),
+            models.FeedColdContent.content_gz,
+        )
+        .outerjoin(models.RSSSource, models.RSSSource.id == models.Feed.source_id)
+        .outerjoin(models.FeedColdContent, models.FeedColdContent.feed_id == models.Feed.id)
+        .order_by(models.Feed.id)
+        .limit(PAGE_SIZE)
+    )
+    last_id = 0
+    while True:
+        rows = db.execute(stmt.where(models.Feed.id > last_id)).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        for r in rows:
+            content = r.content
+            if content is None and r.content_gz is not None:
+                content = zlib.decompress(r.content_gz).decode("utf-8")
+            yield {
+                "id": r.id,
+                "source_id": r.source_id,
+                "source_name": r.source_name,
+                "source_category": r.source_category,
+                "title": r.title,
+                "original_title": r.original_title,
+                "translated_title": r.translated_title,
+                "link": r.link,
+                "published_at": r.published_at,
+                "content": content,
+                "summary": r.summary,
+                "insight": r.insight,
+                "is_read": bool(r.is_read),
+                "is_archived": bool(r.is_archived),
+                "created_at": r.created_at,
+            }
+
+
+def _iter_kind(db: Session, kind: str) -> Iterator[dict]:
+    return iter_notes(db) if kind == "notes" else iter_feeds(db)
+
+
+def parse_kinds(include: Optional[str]) -> List[str]:
+    kinds = [k.strip() for k in (include or ",".join(EXPORT_KINDS)).split(",") if k.strip()]
+    unknown = [k for k in kinds if k not in EXPORT_KINDS]
+    if unknown or not kinds:
+        raise ValueError(f"Unknown export kinds: {', '.join(unknown) or include}")
+    return kinds
+
+
+def ndjson_chunks(kinds: List[str]) -> Iterator[bytes]:
+    """One {"type": "note"|"feed", ...} object per line, a page per chunk"""
+    db = SessionLocal()
+    try:
+        _begin_snapshot(db)
+        for kind in kinds:
+            record_type = kind[:-1]
+            lines = []
+            for row in _iter_kind(db, kind):
+                lines.append(orjson.dumps({"type": record_type, **row}) + b"\n")
+                if len(lines) >= PAGE_SIZE:
+                    yield b"".join(lines)
+                    lines = []
+            if lines:
+                yield b"".join(lines)
+    finally:
+        db.rollback()
+        db.close()
+
+
+def _filename(row_id: int, title: str) -> str:
+    slug = _UNSAFE_FILENAME_RE.sub(" ", title or "").strip().replace(" ", "-")[:60]
+    return f"{row_id}-{slug}.md" if slug else f"{row_id}.md"
+
+
+def _dir_name(name: Optional[str], default: str) -> str:
+    return _UNSAFE_FILENAME_RE.sub(" ", name or "").strip() or default
+
+
+def _front_matter(fields: dict) -> str:
+    lines = ["---"]
+    for key, value in fields.items():
+        if value is None or value == "" or value == []:
+            continue
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        lines.append(f"{key}: {orjson.dumps(value).decode('utf-8')}")
+    lines.append("---")
+    return "\n".join(lines)
+
+
+def note_markdown(note: dict) -> str:
+    header = _front_matter({
+        "title": note["title"],
+        "category": note["category"],
+        "tags": note["tags"],
+        "source": note["original_link"] or note["feed_link"],
+        "feed_title": note["feed_title"],
+        "created_at": note["created_at"],
+        "updated_at": note["updated_at"],
+    })
+    return f"{header}\n\n# {note['title']}\n\n{note['content'] or ''}\n"
+
+
+def feed_markdown(feed: dict) -> str:
+    header = _front_matter({
+        "title": feed["title"],
+        "original_title": feed["original_title"],
+        "source": feed["source_name"],
+        "category": feed["source_category"],
+        "link": feed["link"],
+        "published_at": feed["published_at"],
+        "is_read": feed["is_read"],
+        "is_archived": feed["is_archived"],
+    })
+    parts = [header, f"# {feed['translated_title'] or feed['title']}"]
+    if feed["summary"]:
+        parts.append(f"## 摘要\n\n{feed['summary']}")
+    if feed["insight"]:
+        parts.append(f"## 洞察\n\n{feed['insight']}")
+    if feed["content"]:
+        parts.append(f"## 原文\n\n{feed['content']}")
+    return "\n\n".join(parts) + "\n"
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that zipfile streams into"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+def markdown_zip_chunks(kinds: List[str]) -> Iterator[bytes]:
+    """
+    Zip of notes/<category>/<id>-<title>.md and feeds/<source>/<id>-<title>.md.
+
+    Entries are flushed as they are written; only the zip central directory
+    (about 100 bytes per file) is kept until the end.
+    """
+    sink = _ChunkSink()
+    db = SessionLocal()
+    try:
+        _begin_snapshot(db)
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for kind in kinds:
+                for row in _iter_kind(db, kind):
+                    if kind == "notes":
+                        path = f"notes/{_dir_name(row['category'], 'uncategorized')}/{_filename(row['id'], row['title'])}"
+                        text = note_markdown(row)
+                    else:
+                        path = f"feeds/{_dir_name(row['source_name'], 'unknown')}/{_filename(row['id'], row['title'])}"
+                        text = feed_markdown(row)
+                    archive.writestr(path, text)
+                    if sink.size >= ZIP_CHUNK_BYTES:
+                        yield sink.drain()
+        yield sink.drain()
+    finally:
+        db.rollback()
+        db.close()
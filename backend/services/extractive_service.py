@@ -0,0 +1,172 @@
+"""
+Local extractive pre-summarization for LLM prompts.
+
+Instead of sending a blind prefix of the article, sentences are scored with
+TF-IDF over hashed features (English words + Chinese character bigrams) and
+TextRank on their cosine-similarity graph, all vectorized in NumPy. The best
+sentences are kept, in original order, up to a token budget.
+"""
+import html
+import re
+import zlib
+from typing import List, Tuple
+
+import numpy as np
+
+HASH_DIM = 1 << 12
+MAX_SENTENCES = 400  # keeps the similarity matrix small (400x400)
+REDUNDANCY_THRESHOLD = 0.8  # skip sentences this similar to one already chosen
+MIN_COVERAGE = 0.5  # below this share of the budget, clip an oversized sentence in
+DAMPING = 0.85
+ITERATIONS = 30
+
+_HTML_DROP_RE = re.compile(r"<(script|style|figure|nav|footer)[^>]*>.*?</\1>", re.S | re.I)
+_HTML_BREAK_RE = re.compile(r"<(br|/p|/div|/li|/h[1-6])[^>]*>", re.I)
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"[ \t\r\f\v]+")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[。！？；!?])\s*|(?<=[.])\s+|\n+")
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]+")
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+_WORD_RE = re.compile(r"[A-Za-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an the and or but if of to in on at by for with from as is are was were be been "
+    "it its this that these those we you he she they i our your their not no so than "
+    "can will would should could has have had do does did about into over more most".split()
+)
+
+
+def clean_text(raw: str) -> str:
+    """Strip HTML markup and collapse whitespace, keeping paragraph breaks"""
+    if not raw:
+        return ""
+    text = _HTML_DROP_RE.sub(" ", raw)
+    text = _HTML_BREAK_RE.sub("\n", text)
+    text = _HTML_TAG_RE.sub(" ", text)
+    text = html.unescape(text)
+    text = _SPACE_RE.sub(" ", text)
+    return "\n".join(line.strip() for line in text.split("\n") if line.strip())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count: ~1 per Chinese character, ~1.3 per English word"""
+    if not text:
+        return 0
+    return len(_CJK_RE.findall(text)) + int(len(_WORD_RE.findall(text)) * 1.3)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT_RE.split(text) if s and len(s.strip()) > 1]
+
+
+def hashed_features(text: str, dim: int = HASH_DIM) -> List[int]:
+    """Hashed term ids: English words minus stopwords, Chinese character bigrams"""
+    features = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token[0] >= "\u4e00":
+            # Chinese has no spaces; character bigrams work as terms
+            grams = [token[i:i + 2] for i in range(len(token) - 1)] or [token]
+            features.extend(zlib.crc32(g.encode("utf-8")) % dim for g in grams)
+        elif token not in STOPWORDS and len(token) > 1:
+            features.append(zlib.crc32(token.encode("utf-8")) % dim)
+    return features
+
+
+def sentence_vectors(sentences: List[str]) -> np.ndarray:
+    """L2-normalized TF-IDF rows over hashed features, one per sentence"""
+    n = len(sentences)
+    tf = np.zeros((n, HASH_DIM), dtype=np.float32)
+    for i, sentence in enumerate(sentences):
+        features = hashed_features(sentence)
+        if features:
+            np.add.at(tf[i], features, 1.0)
+
+    tf = np.log1p(tf)
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((n + 1) / (df + 1)) + 1.0
+    x = tf * idf
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return np.divide(x, norms, out=np.zeros_like(x), where=norms > 0)
+
+
+def score_sentences(x: np.ndarray) -> np.ndarray:
+    """TextRank over cosine similarity, blended with centroid similarity"""
+    n = x.shape[0]
+    sim = x @ x.T
+    np.fill_diagonal(sim, 0.0)
+    row_sums = sim.sum(axis=1, keepdims=True)
+    transition = np.divide(sim, row_sums, out=np.full_like(sim, 1.0 / n), where=row_sums > 0)
+
+    rank = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(ITERATIONS):
+        rank = (1 - DAMPING) / n + DAMPING * (transition.T @ rank)
+
+    centroid = x.sum(axis=0)
+    centroid_norm = np.linalg.norm(centroid)
+    centrality = x @ centroid / centroid_norm if centroid_norm > 0 else np.zeros(n, dtype=np.float32)
+
+    scores = rank / rank.max() + 0.5 * centrality
+    scores[~x.any(axis=1)] = 0.0  # sentences with no content words
+    return scores
+
+
+def clip_to_budget(text: str, token_budget: int) -> str:
+    """Prefix of `text` estimated at no more than `token_budget`, cut at a word boundary"""
+    total = estimate_tokens(text)
+    if total <= token_budget:
+        return text
+    clipped = text[:int(len(text) * token_budget / total)]
+    while clipped and estimate_tokens(clipped) > token_budget:
+        clipped = clipped[:int(len(clipped) * 0.9)]
+    if " " in clipped and not _CJK_RE.search(clipped[-1:]):
+        clipped = clipped[:clipped.rindex(" ")]
+    return clipped.rstrip()
+
+
+def extract(content: str, token_budget: int) -> Tuple[str, int]:
+    """
+    Return (text, estimated_tokens) for the most informative sentences of
+    `content` that fit in `token_budget`, in their original order.
+    """
+    text = clean_text(content)
+    total = estimate_tokens(text)
+    if total <= token_budget:
+        return text, total
+
+    sentences = split_sentences(text)[:MAX_SENTENCES]
+    if len(sentences) < 2:
+        # One giant sentence: fall back to a prefix of roughly the budget
+        clipped = clip_to_budget(text, token_budget)
+        return clipped, estimate_tokens(clipped)
+
+    x = sentence_vectors(sentences)
+    scores = score_sentences(x)
+    costs = [estimate_tokens(s) for s in sentences]
+
+    chosen = []
+    used = 0
+    oversized = None  # best-scoring sentence that didn't fit
+    for i in np.argsort(-scores, kind="stable"):
+        if scores[i] <= 0:
+            break
+        if chosen and float(np.max(x[chosen] @ x[i])) > REDUNDANCY_THRESHOLD:
+            continue
+        if used + costs[i] > token_budget:
+            if oversized is None:
+                oversized = i
+            continue
+        chosen.append(i)
+        used += costs[i]
+
+    parts = {i: sentences[i] for i in chosen}
+    if oversized is not None and used < token_budget * MIN_COVERAGE:
+        # Mostly one long run-on sentence: keep the start of it rather than
+        # sending a few short sentences and wasting the budget
+        clipped = clip_to_budget(sentences[oversized], token_budget - used)
+        if clipped:
+            parts[oversized] = clipped
+            used += estimate_tokens(clipped)
+
+    # Per-sentence estimates don't add up exactly to the joined text's
+    extracted = " ".join(parts[i] for i in sorted(parts))
+    return extracted, estimate_tokens(extracted)
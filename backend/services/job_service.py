@@ -0,0 +1,330 @@
+import json
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional
+
+from sqlalchemy import select, update, or_, and_, func
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import SessionLocal, insert_ignoring_conflicts
+import models
+
+settings = get_settings()
+
+JOB_KINDS = ("fetch_source", "analyze_feed", "build_digest")
+
+# Retry backoff in seconds, indexed by attempt number
+RETRY_BACKOFF = (30, 120, 600)
+
+
+def job_to_dict(job: models.Job) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "target_id": job.target_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+def _active_jobs(db: Session, kind: str, target_ids: List[int]) -> dict:
+    return {
+        job.target_id: job
+        for job in db.query(models.Job).filter(
+            models.Job.kind == kind,
+            models.Job.target_id.in_(target_ids),
+            models.Job.status.in_(("pending", "running")),
+        )
+    }
+
+
+def _insert_pending(db: Session, kind: str, target_id: Optional[int]):
+    # ux_jobs_active makes this a no-op when the same job is already active,
+    # even if another API process inserted it a moment ago
+    db.execute(
+        insert_ignoring_conflicts(models.Job)
+        .values(
+            kind=kind,
+            target_id=target_id,
+            status="pending",
+            attempts=0,
+            max_attempts=settings.job_max_attempts,
+            run_after=datetime.utcnow(),
+            created_at=datetime.utcnow(),
+            updated_at=datetime.utcnow(),
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+def enqueue_job(db: Session, kind: str, target_id: Optional[int] = None) -> models.Job:
+    """
+    Queue a job for the workers.
+
+    If an identical job is already pending or running, that job is returned
+    instead. Concurrent callers in any process therefore share one execution
+    and its result.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    for _ in range(3):
+        _insert_pending(db, kind, target_id)
+        db.commit()
+        job = _active_jobs(db, kind, [target_id]).get(target_id)
+        if job:
+            return job
+        # The active job finished between our insert and read; try again
+
+    raise RuntimeError(f"Could not enqueue {kind}({target_id})")
+
+
+def enqueue_jobs(db: Session, kind: str, target_ids: Iterable[int]) -> List[models.Job]:
+    """Queue one job per target in a single transaction, sharing active duplicates"""
+    target_ids = list(target_ids)
+    for target_id in target_ids:
+        _insert_pending(db, kind, target_id)
+    db.commit()
+
+    active = _active_jobs(db, kind, target_ids)
+    return [active[target_id] for target_id in target_ids if target_id in active]
+
+
+def recently_finished(db: Session, kind: str, target_ids: Iterable[int], within_seconds: int) -> dict:
+    """Map target_id -> seconds until its cooldown ends, for jobs done within the window"""
+    target_ids = list(target_ids)
+    if within_seconds <= 0 or not target_ids:
+        return {}
+
+    now = datetime.utcnow()
+    rows = db.query(models.Job.target_id, func.max(models.Job.updated_at)).filter(
+        models.Job.kind == kind,
+        models.Job.target_id.in_(target_ids),
+        models.Job.status == "done",
+        models.Job.updated_at > now - timedelta(seconds=within_seconds),
+    ).group_by(models.Job.target_id)
+
+    return {
+        target_id: max(int(within_seconds - (now - finished_at).total_seconds()), 1)
+        for target_id, finished_at in rows
+    }
+
+
+def _reap_expired(db: Session, now: datetime):
+    """Fail running jobs whose lease expired after their last allowed attempt"""
+    db.execute(
+        update(models.Job)
+        .where(
+            models.Job.status == "running",
+            models.Job.lease_expires_at < now,
+            models.Job.attempts >= models.Job.max_attempts,
+        )
+        .values(status="failed", error="Lease expired", lease_token=None)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def claim_job(db: Session, worker_id: str, kinds: Optional[Iterable[str]] = None) -> Optional[models.Job]:
+    """
+    Atomically lease the oldest runnable job.
+
+    A job is runnable when it is pending and due, or when a previous worker's
+    lease has expired (crashed or killed worker). The UPDATE re-checks the
+    condition, so two workers racing for the same row can't both win.
+    """
+    now = datetime.utcnow()
+    _reap_expired(db, now)
+
+    claimable = or_(
+        and_(models.Job.status == "pending", models.Job.run_after <= now),
+        and_(
+            models.Job.status == "running",
+            models.Job.lease_expires_at < now,
+            models.Job.attempts < models.Job.max_attempts,
+        ),
+    )
+    if kinds:
+        claimable = and_(claimable, models.Job.kind.in_(list(kinds)))
+
+    candidate = (
+        select(models.Job.id)
+        .where(claimable)
+        .order_by(models.Job.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+    token = uuid.uuid4().hex
+    result = db.execute(
+        update(models.Job)
+        .where(models.Job.id == candidate, claimable)
+        .values(
+            status="running",
+            attempts=models.Job.attempts + 1,
+            lease_owner=worker_id,
+            lease_token=token,
+            lease_expires_at=now + timedelta(seconds=settings.job_lease_seconds),
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    if result.rowcount == 0:
+        return None
+
+    return db.query(models.Job).filter(models.Job.lease_token == token).first()
+
+
+def claim_periodic(name: str, interval_seconds: float) -> bool:
+    """
+    Claim this interval's run of a periodic task (maintenance, backup, ...).
+
+    Every API process runs the same loops; the app_state row holding the
+    last run time is updated atomically, so only one process per interval
+    gets True. Opens its own session.
+    """
+    key = f"schedule:{name}"
+    now = datetime.utcnow()
+    # Some slack so processes waking a little apart don't both run
+    due_before = (now - timedelta(seconds=interval_seconds * 0.9)).isoformat()
+    db = SessionLocal()
+    try:
+        db.execute(
+            insert_ignoring_conflicts(models.AppState)
+            .values(key=key, value="", updated_at=now)
+            .on_conflict_do_nothing()
+        )
+        claimed = db.execute(
+            update(models.AppState)
+            .where(models.AppState.key == key, models.AppState.value < due_before)
+            .values(value=now.isoformat(), updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return claimed.rowcount == 1
+    finally:
+        db.close()
+
+
+class LeaseLost(Exception):
+    """The job's lease expired or was taken over; its result must not be saved"""
+
+
+def renew_lease(db: Session, job_id: int, lease_token: str) -> bool:
+    """Push lease_expires_at forward; False if this worker no longer holds the lease"""
+    updated = db.execute(
+        update(models.Job)
+        .where(models.Job.id == job_id, models.Job.lease_token == lease_token, models.Job.status == "running")
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=settings.job_lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return updated.rowcount == 1
+
+
+class LeaseKeeper:
+    """
+    Heartbeat thread that renews a job's lease while a worker runs it.
+
+    Used as a context manager around the handler. If a renewal finds the lease
+    gone, `lost` is set, `on_lost` is called (the worker cancels the handler
+    with it) and ensure_lease() starts raising LeaseLost.
+    """
+
+    def __init__(self, job: models.Job):
+        self.job_id = job.id
+        self.lease_token = job.lease_token
+        self.lost = threading.Event()
+        self.on_lost: Optional[Callable[[], None]] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._context_token = None
+
+    def __enter__(self):
+        self._context_token = _current_lease.set(self)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        _current_lease.reset(self._context_token)
+
+    def _run(self):
+        interval = max(settings.job_lease_seconds / 3, 1)
+        while not self._stop.wait(interval):
+            db = SessionLocal()
+            try:
+                held = renew_lease(db, self.job_id, self.lease_token)
+            except Exception as e:
+                # A busy database is not a lost lease; try again next beat
+                print(f"⚠️ Could not renew lease of job {self.job_id}: {e}")
+                continue
+            finally:
+                db.close()
+            if not held:
+                self.lost.set()
+                if self.on_lost:
+                    try:
+                        self.on_lost()
+                    except RuntimeError:
+                        pass  # the handler's event loop already finished
+                return
+
+    def ensure_held(self):
+        if self.lost.is_set():
+            raise LeaseLost(f"Lease of job {self.job_id} was lost")
+
+
+_current_lease: ContextVar[Optional[LeaseKeeper]] = ContextVar("current_lease", default=None)
+
+
+def ensure_lease():
+    """Raise LeaseLost if the job running in this context lost its lease; call before committing results"""
+    keeper = _current_lease.get()
+    if keeper is not None:
+        keeper.ensure_held()
+
+
+def complete_job(db: Session, job: models.Job, result: Optional[dict] = None) -> bool:
+    """Mark a leased job done; returns False if the lease was lost meanwhile"""
+    updated = db.execute(
+        update(models.Job)
+        .where(models.Job.id == job.id, models.Job.lease_token == job.lease_token)
+        .values(
+            status="done",
+            result=json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+            error=None,
+            lease_token=None,
+            lease_expires_at=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return updated.rowcount == 1
+
+
+def fail_job(db: Session, job: models.Job, error: str) -> bool:
+    """Record a failure and schedule a retry with backoff, or give up"""
+    if job.attempts >= job.max_attempts:
+        values = {"status": "failed"}
+    else:
+        delay = RETRY_BACKOFF[min(job.attempts, len(RETRY_BACKOFF)) - 1]
+        values = {"status": "pending", "run_after": datetime.utcnow() + timedelta(seconds=delay)}
+
+    updated = db.execute(
+        update(models.Job)
+        .where(models.Job.id == job.id, models.Job.lease_token == job.lease_token)
+        .values(error=error[:2000], lease_token=None, lease_expires_at=None, **values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return updated.rowcount == 1
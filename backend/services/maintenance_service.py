@@ -0,0 +1,290 @@
+import asyncio
+import json
+import os
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import bindparam, delete, select, text, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from config import get_settings
+from database import engine, SessionLocal
+import models
+from services.event_service import prune_events
+from services.job_service import claim_periodic
+
+settings = get_settings()
+
+# Pause between batches so API writers can grab the SQLite write lock
+BATCH_PAUSE_SECONDS = 0.05
+
+# Last maintenance report, exposed through GET /maintenance/report
+last_report: Optional[dict] = None
+
+
+def _eligible_feeds_query(cutoff: datetime, after_id: int, batch_size: int, mode: str):
+    """Read/archived feeds older than cutoff that no note points to"""
+    referenced = select(models.Note.feed_id).where(models.Note.feed_id.isnot(None))
+    query = (
+        select(models.Feed.id, models.Feed.content)
+        .where(
+            models.Feed.id > after_id,
+            models.Feed.created_at < cutoff,
+            (models.Feed.is_read == True) | (models.Feed.is_archived == True),
+            models.Feed.id.notin_(referenced),
+        )
+        .order_by(models.Feed.id)
+        .limit(batch_size)
+    )
+    if mode == "compact":
+        # Already compacted feeds have no content left to move
+        query = query.where(models.Feed.content.isnot(None))
+    return query
+
+
+def _detach_purged_feeds(db: Session, ids: list):
+    """Clear references to feeds deleted by purge, in the same transaction"""
+    # Keep the cost history, just not the link
+    db.execute(
+        update(models.AnalysisLog).where(models.AnalysisLog.feed_id.in_(ids)).values(feed_id=None)
+    )
+    # A running job finds its feed gone and fails on its own
+    db.execute(delete(models.Job).where(
+        models.Job.kind == "analyze_feed",
+        models.Job.target_id.in_(ids),
+        models.Job.status != "running",
+    ))
+
+    purged = set(ids)
+    chunks = db.execute(
+        text(
+            "SELECT DISTINCT c.id, c.feed_ids FROM digest_chunks c, json_each(c.feed_ids) j "
+            "WHERE j.value IN :ids"
+        ).bindparams(bindparam("ids", expanding=True)),
+        {"ids": list(ids)},
+    ).all()
+    for chunk in chunks:
+        db.execute(
+            update(models.DigestChunk)
+            .where(models.DigestChunk.id == chunk.id)
+            .values(feed_ids=json.dumps([i for i in json.loads(chunk.feed_ids) if i not in purged]))
+        )
+
+
+def retention_cutoff(days: int = None) -> datetime:
+    days = settings.feed_retention_days if days is None else days
+    return datetime.utcnow() - timedelta(days=days)
+
+
+def prune_snapshots(db: Session, days: int = None, batch_size: int = None) -> dict:
+    """Delete feed_snapshots older than snapshot_retention_days, then blobs no snapshot uses"""
+    days = settings.snapshot_retention_days if days is None else days
+    batch_size = batch_size or settings.feed_retention_batch_size
+    if days <= 0:
+        return {"snapshots": 0, "blobs": 0}
+
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    snapshots = 0
+    while True:
+        ids = db.execute(
+            select(models.FeedSnapshot.id).where(models.FeedSnapshot.fetched_at < cutoff).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        db.execute(delete(models.FeedSnapshot).where(models.FeedSnapshot.id.in_(ids)))
+        db.commit()
+        snapshots += len(ids)
+        time.sleep(BATCH_PAUSE_SECONDS)
+
+    blobs = 0
+    referenced = select(models.FeedSnapshot.sha256)
+    while True:
+        digests = db.execute(
+            select(models.FeedBlob.sha256).where(models.FeedBlob.sha256.notin_(referenced)).limit(batch_size)
+        ).scalars().all()
+        if not digests:
+            break
+        db.execute(delete(models.FeedBlob).where(models.FeedBlob.sha256.in_(digests)))
+        db.commit()
+        blobs += len(digests)
+        time.sleep(BATCH_PAUSE_SECONDS)
+
+    return {"snapshots": snapshots, "blobs": blobs}
+
+
+def apply_retention_policy(db: Session, days: int = None, mode: str = None, batch_size: int = None) -> dict:
+    """
+    Compact or purge old read/archived feeds in small batches, then drop old
+    raw snapshots (prune_snapshots).
+
+    - compact: move content into feed_cold_content (zlib) and clear feeds.content
+    - purge: delete the feed row entirely, and with it the feed's jobs and its
+      id in analysis_logs and digest_chunks
+    Feeds referenced by a note are never touched. Each batch is its own
+    transaction so the write lock is only held briefly.
+    """
+    days = settings.feed_retention_days if days is None else days
+    mode = mode or settings.feed_retention_mode
+    batch_size = batch_size or settings.feed_retention_batch_size
+
+    if mode not in ("compact", "purge"):
+        raise ValueError(f"Unknown retention mode: {mode}")
+
+    cutoff = retention_cutoff(days)
+    compacted = 0
+    purged = 0
+    content_bytes = 0
+    batches = 0
+    last_id = 0
+
+    while True:
+        rows = db.execute(_eligible_feeds_query(cutoff, last_id, batch_size, mode)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        if mode == "purge":
+            ids = [row.id for row in rows]
+            content_bytes += sum(len(row.content.encode("utf-8")) for row in rows if row.content)
+            _detach_purged_feeds(db, ids)
+            db.execute(delete(models.FeedColdContent).where(models.FeedColdContent.feed_id.in_(ids)))
+            db.execute(delete(models.Feed).where(models.Feed.id.in_(ids)))
+            purged += len(ids)
+        else:
+            for row in rows:
+                raw = row.content.encode("utf-8")
+                db.merge(models.FeedColdContent(
+                    feed_id=row.id,
+                    content_gz=zlib.compress(raw, 6),
+                    original_size=len(raw),
+                ))
+                db.query(models.Feed).filter(models.Feed.id == row.id).update(
+                    {models.Feed.content: None}, synchronize_session=False
+                )
+                content_bytes += len(raw)
+                compacted += 1
+
+        db.commit()
+        batches += 1
+        time.sleep(BATCH_PAUSE_SECONDS)
+
+    return {
+        "mode": mode,
+        "cutoff": cutoff.isoformat(),
+        "batches": batches,
+        "compacted": compacted,
+        "purged": purged,
+        "content_bytes": content_bytes,
+        "snapshots_pruned": prune_snapshots(db, batch_size=batch_size),
+    }
+
+
+def load_cold_content(feed_id: int, db: Session) -> Optional[str]:
+    """Return decompressed content for a compacted feed, if any"""
+    cold = db.query(models.FeedColdContent).filter(models.FeedColdContent.feed_id == feed_id).first()
+    if not cold:
+        return None
+    return zlib.decompress(cold.content_gz).decode("utf-8")
+
+
+def attach_cold_content(feed: models.Feed, db: Session) -> models.Feed:
+    """
+    Fill in a compacted feed's content for reading. It is set as the loaded
+    value, not as a change, so a later commit can't write it back into
+    feeds.content and undo the compaction.
+    """
+    if feed.content is None:
+        content = load_cold_content(feed.id, db)
+        if content is not None:
+            set_committed_value(feed, "content", content)
+    return feed
+
+
+def _database_file_size() -> int:
+    path = engine.url.database
+    if not path or path == ":memory:" or not os.path.exists(path):
+        return 0
+    return os.path.getsize(path)
+
+
+def vacuum_and_analyze(pages: int = None) -> dict:
+    """
+    Release free pages with incremental VACUUM and refresh planner statistics.
+
+    Only `pages` pages are freed per run so the write lock is held briefly;
+    the one-time switch to auto_vacuum=INCREMENTAL is done by a migration.
+    """
+    if engine.dialect.name != "sqlite":
+        return {"skipped": f"not supported for {engine.dialect.name}"}
+
+    pages = pages or settings.vacuum_pages_per_run
+    size_before = _database_file_size()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        page_size = conn.exec_driver_sql("PRAGMA page_size").scalar()
+        free_before = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        # A no-op unless auto_vacuum is INCREMENTAL. Each step of the statement
+        # frees one page and execute() would only step once; executescript()
+        # runs it to completion.
+        conn.connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        free_after = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+
+        conn.exec_driver_sql("PRAGMA analysis_limit = 1000")
+        conn.exec_driver_sql("ANALYZE")
+
+    size_after = _database_file_size()
+
+    return {
+        "page_size": page_size,
+        "free_pages_before": free_before,
+        "free_pages_after": free_after,
+        "file_size_before": size_before,
+        "file_size_after": size_after,
+        "released_bytes": max(free_before - free_after, 0) * page_size,
+        "reclaimed_bytes": max(size_before - size_after, 0),
+    }
+
+
+def run_maintenance(db: Session, days: int = None, mode: str = None) -> dict:
+    """Run retention followed by vacuum/analyze and remember the report"""
+    global last_report
+
+    started = time.perf_counter()
+    report = {
+        "started_at": datetime.utcnow().isoformat(),
+        "retention": apply_retention_policy(db, days=days, mode=mode),
+        "events_pruned": prune_events(db),
+        "vacuum": vacuum_and_analyze(),
+    }
+    report["duration_seconds"] = round(time.perf_counter() - started, 3)
+
+    last_report = report
+    return report
+
+
+def _run_maintenance_in_session() -> dict:
+    db = SessionLocal()
+    try:
+        return run_maintenance(db)
+    finally:
+        db.close()
+
+
+async def maintenance_loop():
+    """Background task started from main.lifespan"""
+    interval_hours = settings.maintenance_interval_hours
+    if interval_hours <= 0:
+        return
+
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            if not await asyncio.to_thread(claim_periodic, "maintenance", interval_hours * 3600):
+                continue  # another process took this run
+            report = await asyncio.to_thread(_run_maintenance_in_session)
+            print(f"🧹 Maintenance finished: {report}")
+        except Exception as e:
+            print(f"⚠️ Maintenance failed: {e}")
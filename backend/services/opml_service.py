@@ -0,0 +1,277 @@
+"""
+OPML import/export for RSS sources.
+
+Import parses the outline tree, normalizes rsshub:// URLs, then probes every
+new URL concurrently (at most `opml_validate_concurrency` at once). A URL that
+serves a web page instead of a feed is resolved through its
+<link rel="alternate"> tag. Valid sources are inserted with multi-row INSERTs and
+every URL gets a line in the report.
+"""
+import asyncio
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import List, Tuple
+from urllib.parse import urljoin, urlparse
+
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import insert_ignoring_conflicts
+import models
+from services.rss_service import USER_AGENT, normalize_source_url, source_type_for_category
+
+settings = get_settings()
+
+MAX_PROBE_BYTES = 2 * 1024 * 1024
+INSERT_BATCH = 500  # rows per multi-row INSERT, well under SQLite's variable limit
+FEED_LINK_TYPES = ("application/rss+xml", "application/atom+xml", "application/feed+json", "application/json")
+
+
+def parse_opml(body: bytes) -> List[dict]:
+    """Flatten OPML outlines into {name, url, category}; parent outline text is the category"""
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError as e:
+        raise ValueError(f"Invalid OPML: {e}")
+
+    body_node = root.find("body")
+    if body_node is None:
+        raise ValueError("Invalid OPML: missing <body>")
+
+    entries = []
+
+    def walk(node, category: str):
+        for outline in node.findall("outline"):
+            url = outline.get("xmlUrl") or outline.get("xmlurl")
+            name = outline.get("title") or outline.get("text") or ""
+            if url:
+                entries.append({
+                    "name": name.strip(),
+                    "url": url.strip(),
+                    "category": (outline.get("category") or category).strip(),
+                })
+            else:
+                walk(outline, name.strip() or category)
+
+    walk(body_node, "")
+    return entries
+
+
+def build_opml(sources: List[models.RSSSource]) -> bytes:
+    """OPML 2.0 document with one folder outline per category"""
+    root = ET.Element("opml", version="2.0")
+    head = ET.SubElement(root, "head")
+    ET.SubElement(head, "title").text = "Brain-Sync RSS sources"
+    ET.SubElement(head, "dateCreated").text = datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S GMT")
+    body = ET.SubElement(root, "body")
+
+    folders = {}
+    for source in sorted(sources, key=lambda s: (s.category or "", s.name or "")):
+        parent = body
+        if source.category:
+            if source.category not in folders:
+                folders[source.category] = ET.SubElement(body, "outline", text=source.category, title=source.category)
+            parent = folders[source.category]
+        ET.SubElement(
+            parent,
+            "outline",
+            type="rss",
+            text=source.name,
+            title=source.name,
+            xmlUrl=source.url,
+        )
+
+    ET.indent(root)
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+
+class _AlternateLinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "link":
+            return
+        attrs = dict(attrs)
+        rel = (attrs.get("rel") or "").lower().split()
+        if "alternate" in rel and (attrs.get("type") or "").lower() in FEED_LINK_TYPES and attrs.get("href"):
+            self.links.append(attrs["href"])
+
+
+def discover_feed_links(html: str, base_url: str) -> List[str]:
+    """Feed URLs advertised by <link rel="alternate"> in an HTML page"""
+    parser = _AlternateLinkParser()
+    try:
+        parser.feed(html)
+    except Exception:
+        pass
+    return [urljoin(base_url, href) for href in parser.links]
+
+
+def _parse_feed(body: bytes):
+    import feedparser
+
+    parsed = feedparser.parse(body)
+    return parsed if parsed.get("version") else None
+
+
+async def _download(client, url: str) -> Tuple[bytes, str, str]:
+    """(body up to MAX_PROBE_BYTES, content type, final URL after redirects)"""
+    async with client.stream("GET", url) as response:
+        response.raise_for_status()
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= MAX_PROBE_BYTES:
+                break
+        return b"".join(chunks), response.headers.get("content-type", ""), str(response.url)
+
+
+async def probe_feed(client, url: str) -> dict:
+    """Check that `url` is a feed, following one <link rel="alternate"> hop from HTML pages"""
+    try:
+        body, content_type, final_url = await _download(client, url)
+        parsed = await asyncio.to_thread(_parse_feed, body)
+        if parsed:
+            return {"ok": True, "feed_url": url, "title": parsed.feed.get("title")}
+
+        if "html" not in content_type and not body.lstrip()[:15].lower().startswith((b"<!doctype", b"<html")):
+            return {"ok": False, "detail": "Not an RSS/Atom feed"}
+
+        candidates = discover_feed_links(body.decode("utf-8", errors="replace"), final_url)
+        for candidate in candidates[:3]:
+            try:
+                body, _, _ = await _download(client, candidate)
+            except Exception:
+                continue
+            parsed = await asyncio.to_thread(_parse_feed, body)
+            if parsed:
+                return {
+                    "ok": True,
+                    "feed_url": candidate,
+                    "title": parsed.feed.get("title"),
+                    "detail": f"Discovered feed from {url}",
+                }
+        return {"ok": False, "detail": "Web page without a feed link" if not candidates else "Advertised feed links don't work"}
+    except Exception as e:
+        return {"ok": False, "detail": f"{type(e).__name__}: {e}"[:300]}
+
+
+async def probe_all(urls: List[str]) -> dict:
+    """Probe URLs concurrently with bounded parallelism; returns url -> probe result"""
+    import httpx
+
+    semaphore = asyncio.Semaphore(settings.opml_validate_concurrency)
+    limits = httpx.Limits(max_connections=settings.opml_validate_concurrency)
+    timeout = httpx.Timeout(settings.opml_validate_timeout_seconds)
+
+    async with httpx.AsyncClient(
+        timeout=timeout, limits=limits, follow_redirects=True, headers={"User-Agent": USER_AGENT}
+    ) as client:
+        async def bounded(url):
+            async with semaphore:
+                return url, await probe_feed(client, url)
+
+        return dict(await asyncio.gather(*(bounded(url) for url in urls)))
+
+
+def _fallback_name(url: str) -> str:
+    return urlparse(url).netloc or url
+
+
+async def import_opml(db: Session, body: bytes, validate: bool = True) -> dict:
+    """
+    Import sources from an OPML document.
+
+    Statuses per URL: created, exists (URL already a source), duplicate
+    (repeated in the file), invalid (failed validation).
+    """
+    started = time.perf_counter()
+    entries = parse_opml(body)
+
+    existing_urls = {url for (url,) in db.query(models.RSSSource.url)}
+    results = []
+    pending = []
+    seen = set()
+
+    for entry in entries:
+        url = normalize_source_url(entry["url"])
+        result = {"url": entry["url"], "feed_url": url, "name": entry["name"], "category": entry["category"]}
+        results.append(result)
+        if url in seen:
+            result["status"] = "duplicate"
+        elif url in existing_urls:
+            result["status"] = "exists"
+        else:
+            pending.append(result)
+        seen.add(url)
+
+    probes = await probe_all([r["feed_url"] for r in pending]) if validate and pending else {}
+
+    to_insert = {}
+    for result in pending:
+        probe = probes.get(result["feed_url"])
+        if probe is not None:
+            if not probe["ok"]:
+                result.update(status="invalid", detail=probe["detail"])
+                continue
+            result["feed_url"] = probe["feed_url"]
+            result["name"] = result["name"] or probe.get("title") or ""
+            if probe.get("detail"):
+                result["detail"] = probe["detail"]
+
+        # A discovered feed URL may already exist or repeat another entry
+        if result["feed_url"] in existing_urls or result["feed_url"] in to_insert:
+            result["status"] = "exists" if result["feed_url"] in existing_urls else "duplicate"
+            continue
+
+        result["name"] = result["name"] or _fallback_name(result["feed_url"])
+        to_insert[result["feed_url"]] = result
+
+    if to_insert:
+        now = datetime.utcnow()
+        rows = [
+            {
+                "name": r["name"],
+                "url": url,
+                "type": source_type_for_category(r["category"]),
+                "category": r["category"],
+                "created_at": now,
+            }
+            for url, r in to_insert.items()
+        ]
+        # rss_sources.url is unique, so a source added meanwhile is skipped
+        # and RETURNING only reports the rows this import created
+        created = {}
+        for i in range(0, len(rows), INSERT_BATCH):
+            created.update(db.execute(
+                insert_ignoring_conflicts(models.RSSSource)
+                .values(rows[i:i + INSERT_BATCH])
+                .on_conflict_do_nothing()
+                .returning(models.RSSSource.url, models.RSSSource.id)
+            ).all())
+        db.commit()
+
+        for url, result in to_insert.items():
+            if url in created:
+                result.update(status="created", source_id=created[url])
+            else:
+                result["status"] = "exists"
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+    return {
+        "message": f"Imported {counts.get('created', 0)} of {len(results)} sources",
+        "total": len(results),
+        "counts": counts,
+        "validated": validate,
+        "elapsed_seconds": round(time.perf_counter() - started, 2),
+        "results": results,
+    }
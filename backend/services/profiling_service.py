@@ -0,0 +1,301 @@
+"""
+On-demand profiling and the slow-query log.
+
+A request is profiled when it carries `X-Profile: 1` together with a valid
+access token, or at random with probability `profile_sample_rate` (worker
+jobs use the same rate). Only the endpoint call is profiled, in the thread
+it runs on: instrument_endpoints() wraps every endpoint, the middleware
+just opens the session and counts its queries. Endpoints that return a
+streaming response are refused, since their work happens after the call.
+cProfile can't be enabled while another profiler is active (per thread up to
+Python 3.11, per process with sys.monitoring from 3.12), so such requests
+run unprofiled. Profiles are saved as <id>.prof (pstats format, e.g. for
+snakeviz) with an <id>.json summary next to them.
+
+Every statement slower than `slow_query_ms` is logged with its duration, the
+route or job that issued it and SQLite's EXPLAIN QUERY PLAN.
+"""
+import asyncio
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import event
+from starlette.responses import StreamingResponse
+
+from config import get_settings
+from database import engine
+
+settings = get_settings()
+
+PROFILE_HEADER = b"x-profile"
+PLAN_PREFIXES = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+# "GET /feeds/" or "job:analyze_feed", for the slow-query log
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+_current_session: ContextVar[Optional["ProfileSession"]] = ContextVar("current_profile", default=None)
+
+slow_queries = deque(maxlen=settings.slow_query_log_size)
+
+
+class ProfileSession:
+    """One profiled request or job; profiled() adds the profilers"""
+
+    def __init__(self, label: str):
+        self.id = f"{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.label = label
+        self.profilers: List[cProfile.Profile] = []
+        self.skipped: Optional[str] = None
+        self.query_count = 0
+        self.query_ms = 0.0
+        self.started = 0.0
+        self._token = None
+
+    @property
+    def saved(self) -> bool:
+        return bool(self.profilers) and self.skipped is None
+
+    def start(self):
+        self._token = _current_session.set(self)
+        self.started = time.perf_counter()
+
+    def stop(self) -> dict:
+        _current_session.reset(self._token)
+        duration_ms = (time.perf_counter() - self.started) * 1000
+        if not self.saved:
+            return {"id": self.id, "label": self.label, "skipped": self.skipped or "nothing was profiled"}
+        return self.save(duration_ms)
+
+    def save(self, duration_ms: float) -> dict:
+        os.makedirs(settings.profile_dir, exist_ok=True)
+        stats = pstats.Stats(self.profilers[0])
+        for profiler in self.profilers[1:]:
+            stats.add(profiler)
+        stats.dump_stats(os.path.join(settings.profile_dir, f"{self.id}.prof"))
+
+        summary = {
+            "id": self.id,
+            "label": self.label,
+            "duration_ms": round(duration_ms, 1),
+            "query_count": self.query_count,
+            "query_ms": round(self.query_ms, 1),
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        with open(os.path.join(settings.profile_dir, f"{self.id}.json"), "w") as f:
+            json.dump(summary, f)
+        _prune_profiles(settings.profile_keep)
+        return summary
+
+
+def _profiler_active() -> bool:
+    """Whether the interpreter already has a profiler installed where cProfile would go"""
+    monitoring = getattr(sys, "monitoring", None)
+    if monitoring is not None:
+        return monitoring.get_tool(monitoring.PROFILER_ID) is not None
+    return sys.getprofile() is not None
+
+
+@contextmanager
+def profiled():
+    """Profile the enclosed call into the current session, if there is one"""
+    session = _current_session.get()
+    if session is None or session.skipped:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        if _profiler_active():
+            raise ValueError("Another profiling tool is already active")
+        profiler.enable()
+    except ValueError as e:
+        session.skipped = str(e)
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        profiler.disable()
+        session.profilers.append(profiler)
+
+
+def begin(label: str, requested: bool = False) -> Optional[ProfileSession]:
+    """Open a profiling session if requested or sampled; wrap work in profiled(), then call .stop()"""
+    if not (requested or random.random() < settings.profile_sample_rate):
+        return None
+    session = ProfileSession(label)
+    session.start()
+    return session
+
+
+def _authorized(headers: dict) -> bool:
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    return bool(authorization) and authorization.split(" ")[-1] == settings.access_token
+
+
+class ProfilingMiddleware:
+    """Tags each request for the slow-query log and opens a profiling session when asked to"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        label = f"{scope['method']} {scope['path']}"
+        route_token = current_route.set(label)
+        headers = dict(scope["headers"])
+        session = begin(label, requested=headers.get(PROFILE_HEADER) == b"1" and _authorized(headers))
+        if session is None:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                current_route.reset(route_token)
+            return
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                header = (b"x-profile-id", session.id.encode()) if session.saved else \
+                    (b"x-profile-skipped", (session.skipped or "nothing was profiled").encode("latin-1", "replace"))
+                message["headers"] = list(message.get("headers", [])) + [header]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            summary = session.stop()
+            current_route.reset(route_token)
+            print(f"🔬 Profiled {label}: {summary}")
+
+
+def _refuse_streaming(result):
+    if isinstance(result, StreamingResponse):
+        session = _current_session.get()
+        if session is not None:
+            session.skipped = "streaming response, the work happens after the endpoint returns"
+
+
+def instrument_endpoints(app):
+    """Profile endpoint calls (sync ones in their threadpool thread) when their request is profiled"""
+    for route in app.routes:
+        dependant = getattr(route, "dependant", None)
+        if dependant is None:
+            continue
+        dependant.call = _profiled_endpoint(dependant.call)
+
+
+def _profiled_endpoint(fn):
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            if _current_session.get() is None:
+                return await fn(*args, **kwargs)
+            with profiled():
+                result = await fn(*args, **kwargs)
+            _refuse_streaming(result)
+            return result
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if _current_session.get() is None:
+            return fn(*args, **kwargs)
+        with profiled():
+            result = fn(*args, **kwargs)
+        _refuse_streaming(result)
+        return result
+    return wrapper
+
+
+def _prune_profiles(keep: int):
+    for summary in list_profiles()[keep:]:
+        for extension in (".prof", ".json"):
+            path = os.path.join(settings.profile_dir, summary["id"] + extension)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def list_profiles() -> List[dict]:
+    """Saved profile summaries, newest first"""
+    if not os.path.isdir(settings.profile_dir):
+        return []
+    summaries = []
+    for name in os.listdir(settings.profile_dir):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(settings.profile_dir, name)) as f:
+                summaries.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(summaries, key=lambda s: s["created_at"], reverse=True)
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    if os.path.basename(profile_id) != profile_id:
+        return None
+    path = os.path.join(settings.profile_dir, f"{profile_id}.prof")
+    return path if os.path.isfile(path) else None
+
+
+def profile_text(path: str, sort: str = "cumulative", limit: int = 60) -> str:
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+# Slow-query log
+
+def _explain(cursor, statement: str, parameters) -> Optional[List[str]]:
+    if engine.dialect.name != "sqlite" or not statement.lstrip().upper().startswith(PLAN_PREFIXES):
+        return None
+    try:
+        rows = cursor.connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+        return [row[3] for row in rows]
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+
+    session = _current_session.get()
+    if session is not None:
+        session.query_count += 1
+        session.query_ms += duration_ms
+
+    if settings.slow_query_ms <= 0 or duration_ms < settings.slow_query_ms:
+        return
+
+    entry = {
+        "at": datetime.utcnow().isoformat(),
+        "duration_ms": round(duration_ms, 1),
+        "route": current_route.get(),
+        "statement": statement,
+        "parameters": None if executemany else repr(parameters)[:500],
+        "executemany": executemany,
+        "plan": None if executemany else _explain(cursor, statement, parameters),
+    }
+    slow_queries.append(entry)
+    print(f"🐢 Slow query ({entry['duration_ms']} ms, {entry['route']}): {' '.join(statement.split())[:200]}")
@@ -0,0 +1,63 @@
+"""
+Cost-aware routing of analysis calls.
+
+Language is detected locally from CJK characters against Latin words, so titles
+that are already Chinese skip the translation step. The model and output budget
+are picked from settings.analysis_routes by the size of the content sent.
+"""
+import re
+from dataclasses import dataclass
+
+from config import get_settings, AnalysisRoute
+from services.extractive_service import estimate_tokens
+
+settings = get_settings()
+
+_CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+_LATIN_WORD_RE = re.compile(r"[A-Za-z]+")
+
+# Output tokens reserved per title token when the title has to be translated
+TITLE_TRANSLATION_FACTOR = 2
+
+
+@dataclass
+class RouteDecision:
+    route: str
+    model: str
+    max_tokens: int
+    language: str
+    translate_title: bool
+
+
+def detect_language(text: str) -> str:
+    """Return "zh", "en" or "unknown" from CJK characters and Latin words in text"""
+    cjk = len(_CJK_RE.findall(text or ""))
+    latin_words = len(_LATIN_WORD_RE.findall(text or ""))
+    if cjk == 0 and latin_words == 0:
+        return "unknown"
+    # A Chinese word is about two characters; product names in Chinese headlines
+    # ("OpenAI 发布 GPT-5") are whole Latin words, so compare words with words
+    return "zh" if cjk * 2 >= latin_words else "en"
+
+
+def choose_route(title: str, content_tokens: int) -> RouteDecision:
+    language = detect_language(title)
+    translate_title = language != "zh"
+
+    route = next(
+        (r for r in settings.analysis_routes
+         if r.max_content_tokens is None or content_tokens <= r.max_content_tokens),
+        AnalysisRoute(name="default"),
+    )
+
+    max_tokens = route.max_tokens
+    if translate_title:
+        max_tokens += estimate_tokens(title) * TITLE_TRANSLATION_FACTOR
+
+    return RouteDecision(
+        route=route.name,
+        model=route.model or settings.qwen_model,
+        max_tokens=max_tokens,
+        language=language,
+        translate_title=translate_title,
+    )
@@ -1,100 +1,217 @@
-import feedparser
+import hashlib
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Tuple
 from pathlib import Path
 
-import yaml
 from sqlalchemy.orm import Session
+from database import insert_ignoring_conflicts
 import models
 import schemas
+from services.snapshot_service import archive_snapshot
+from services.event_service import publish
 
+# rss_source.yaml is located in the project root (MindSync/)
+CONFIG_PATH = Path(__file__).resolve().parents[2] / "rss_source.yaml"
+CONFIG_HASH_KEY = "rss_source_config_sha256"
 
-async def fetch_rss_feeds(source: models.RSSSource, db: Session) -> List[models.Feed]:
+FETCH_TIMEOUT_SECONDS = 30
+USER_AGENT = "Brain-Sync/1.0"
+RSSHUB_BASE = "https://rsshub.app/"
+
+
+def normalize_source_url(url: str) -> str:
+    """Convert the rsshub:// shorthand to the public RSSHub instance"""
+    url = url.strip()
+    if url.startswith("rsshub://"):
+        url = url.replace("rsshub://", RSSHUB_BASE, 1)
+    return url
+
+
+def source_type_for_category(category: str) -> str:
+    """Map a category name to our simple type field (blog / podcast)"""
+    lower_cat = str(category or "").lower()
+    return "podcast" if "podcast" in lower_cat or "播客" in lower_cat else "blog"
+
+
+def download_feed(url: str) -> bytes:
+    """Download the raw feed body (local paths are read from disk)"""
+    if not url.startswith(("http://", "https://")):
+        return Path(url).read_bytes()
+    
+    import httpx
+    
+    response = httpx.get(
+        url,
+        timeout=FETCH_TIMEOUT_SECONDS,
+        follow_redirects=True,
+        headers={"User-Agent": USER_AGENT},
+    )
+    response.raise_for_status()
+    return response.content
+
+
+def entry_to_row(entry) -> Optional[dict]:
+    """Map a feedparser entry to Feed column values; None if it can't be stored"""
+    link = entry.get('link')
+    if not link:
+        return None
+    
+    # Parse published date
+    published_at = None
+    if entry.get('published_parsed'):
+        published_at = datetime(*entry.published_parsed[:6])
+    
+    # Get content (for podcasts, use description/summary)
+    content = ""
+    if 'content' in entry:
+        content = entry.content[0].value
+    elif 'summary' in entry:
+        content = entry.summary
+    elif 'description' in entry:
+        content = entry.description
+    
+    title = entry.get('title', '')
+    return {
+        "title": title,
+        "original_title": title,
+        "link": link,
+        "published_at": published_at,
+        "content": content,
+    }
+
+
+def parse_entries(body: bytes) -> List[dict]:
+    """Parse a raw feed body into Feed rows. Pure function, safe to run in worker processes."""
+    import feedparser  # heavy import, loaded on first fetch instead of at startup
+    
+    parsed = feedparser.parse(body)
+    rows = []
+    for entry in parsed.entries:
+        row = entry_to_row(entry)
+        if row:
+            rows.append(row)
+    return rows
+
+
+def ingest_rows(source_id: int, rows: List[dict], db: Session, update_existing: bool = False) -> Tuple[List[int], int]:
     """
-    Fetch RSS feeds from a given source and save to database
+    Insert parsed rows for a source, skipping links that already exist.
+    
+    With update_existing, rows whose link exists refresh titles/published_at/
+    content instead (used by replay after parsing changes; compacted feeds
+    are left alone). Returns (new feed ids, number of updated feeds).
     """
-    try:
-        feed = feedparser.parse(source.url)
-        new_feeds = []
+    # One query for all links in this batch instead of one per entry
+    links = [row["link"] for row in rows]
+    existing_links = {
+        link for (link,) in db.query(models.Feed.link).filter(models.Feed.link.in_(links))
+    } if links else set()
+    
+    new_ids = []
+    updated = 0
+    seen = set()
+    
+    for row in rows:
+        if row["link"] in seen:
+            continue
+        seen.add(row["link"])
+        
+        if row["link"] in existing_links:
+            if update_existing:
+                updated += db.query(models.Feed).filter(
+                    models.Feed.link == row["link"],
+                    models.Feed.content.isnot(None),
+                ).update({
+                    models.Feed.title: row["title"],
+                    models.Feed.original_title: row["original_title"],
+                    models.Feed.published_at: row["published_at"],
+                    models.Feed.content: row["content"],
+                }, synchronize_session=False)
+            continue
         
-        for entry in feed.entries:
-            # Check if feed already exists
-            existing_feed = db.query(models.Feed).filter(
-                models.Feed.link == entry.link
-            ).first()
-            
-            if existing_feed:
-                continue
-            
-            # Parse published date
-            published_at = None
-            if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                published_at = datetime(*entry.published_parsed[:6])
-            
-            # Get content (for podcasts, use description/summary)
-            content = ""
-            if hasattr(entry, 'content'):
-                content = entry.content[0].value
-            elif hasattr(entry, 'summary'):
-                content = entry.summary
-            elif hasattr(entry, 'description'):
-                content = entry.description
-            
-            # Create new feed
-            new_feed = models.Feed(
-                source_id=source.id,
-                title=entry.title,
-                original_title=entry.title,
-                link=entry.link,
-                published_at=published_at,
-                content=content,
+        # ux_feeds_link makes a concurrent fetch of the same entry a no-op
+        result = db.execute(
+            insert_ignoring_conflicts(models.Feed)
+            .values(
+                source_id=source_id,
+                is_analyzed=False,
+                is_read=False,
+                is_archived=False,
+                created_at=datetime.utcnow(),
+                **row,
             )
-            
-            db.add(new_feed)
-            new_feeds.append(new_feed)
+            .on_conflict_do_nothing()
+        )
+        if result.rowcount == 1:
+            new_ids.append(result.inserted_primary_key[0])
+    
+    db.commit()
+    return new_ids, updated
+
+
+async def fetch_rss_feeds(source: models.RSSSource, db: Session, raise_errors: bool = False) -> List[models.Feed]:
+    """
+    Fetch RSS feeds from a given source and save to database.
+    
+    The raw body is archived (see snapshot_service) before parsing so it can
+    be replayed offline later. Errors are logged and yield no feeds unless
+    raise_errors is set (the worker needs them to retry the job).
+    """
+    try:
+        body = download_feed(source.url)
+        archive_snapshot(db, source.id, source.url, body)
         
-        db.commit()
-        return new_feeds
+        new_ids, _ = ingest_rows(source.id, parse_entries(body), db)
+        
+        if not new_ids:
+            return []
+        publish(db, "feeds.new", {"source_id": source.id, "count": len(new_ids), "feed_ids": new_ids})
+        return db.query(models.Feed).filter(models.Feed.id.in_(new_ids)).all()
         
     except Exception as e:
+        db.rollback()
         print(f"Error fetching RSS from {source.url}: {e}")
+        if raise_errors:
+            raise
         return []
 
 
-async def fetch_all_rss_sources(db: Session):
-    """
-    Fetch all RSS sources and update feeds
-    """
-    sources = db.query(models.RSSSource).all()
-    
-    total_new = 0
-    for source in sources:
-        new_feeds = await fetch_rss_feeds(source, db)
-        total_new += len(new_feeds)
-    
-    return {"message": f"Fetched {total_new} new feeds from {len(sources)} sources"}
-
-
-def sync_sources_from_config(db: Session):
+def sync_sources_from_config(db: Session, force: bool = False):
     """Load RSS sources from rss_source.yaml and sync with database.
 
+    - Skips all work when the file hash matches the last successful sync
     - Creates new sources when URL does not exist
-    - Updates name/type when URL already exists
+    - Updates name/type/category when URL already exists
     """
-    # rss_source.yaml is located in the project root (MindSync/)
-    project_root = Path(__file__).resolve().parents[2]
-    config_path = project_root / "rss_source.yaml"
+    config_path = CONFIG_PATH
 
     if not config_path.exists():
         raise FileNotFoundError(f"Config file not found: {config_path}")
 
-    with config_path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f) or {}
+    raw = config_path.read_bytes()
+    config_hash = hashlib.sha256(raw).hexdigest()
+
+    state = db.query(models.AppState).filter(models.AppState.key == CONFIG_HASH_KEY).first()
+    if state and state.value == config_hash and not force:
+        return {
+            "message": "Config unchanged since last sync, skipped",
+            "created": 0,
+            "updated": 0,
+            "total": None,
+            "skipped": True,
+        }
+
+    import yaml  # only needed when the config actually changed
 
+    data = yaml.safe_load(raw.decode("utf-8")) or {}
     feeds = data.get("feeds", []) or []
 
+    # Single query for all existing sources, then diff in memory
+    existing_by_url = {source.url: source for source in db.query(models.RSSSource).all()}
+
     created = 0
     updated = 0
+    new_sources = []
 
     for cfg in feeds:
         name = cfg.get("name")
@@ -104,11 +221,9 @@ def sync_sources_from_config(db: Session):
         if not name or not url:
             continue
 
-        # Map yaml category to our simple type field (blog / podcast)
-        lower_cat = str(category).lower()
-        source_type = "podcast" if "podcast" in lower_cat or "播客" in lower_cat else "blog"
+        source_type = source_type_for_category(category)
 
-        existing = db.query(models.RSSSource).filter(models.RSSSource.url == url).first()
+        existing = existing_by_url.get(url)
 
         if existing:
             changed = False
@@ -125,9 +240,18 @@ def sync_sources_from_config(db: Session):
                 updated += 1
         else:
             db_source = models.RSSSource(name=name, url=url, type=source_type, category=category)
-            db.add(db_source)
+            existing_by_url[url] = db_source
+            new_sources.append(db_source)
             created += 1
 
+    if new_sources:
+        db.add_all(new_sources)
+
+    if state:
+        state.value = config_hash
+    else:
+        db.add(models.AppState(key=CONFIG_HASH_KEY, value=config_hash))
+
     db.commit()
 
     return {
@@ -135,4 +259,5 @@ def sync_sources_from_config(db: Session):
         "created": created,
         "updated": updated,
         "total": len(feeds),
+        "skipped": False,
     }
@@ -0,0 +1,33 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical operations within one process.
+
+    While a call for `key` is in flight, further calls with the same key wait
+    for it and receive the same result (or exception) instead of running the
+    operation again. Cross-process coalescing is done in the database
+    (see job_service.enqueue_job).
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # The operation runs in a task owned by SingleFlight and every caller
+        # awaits it through shield(), so a caller that is cancelled (e.g. the
+        # client disconnected) only stops waiting; the others still get the result.
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller was cancelled
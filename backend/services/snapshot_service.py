@@ -0,0 +1,61 @@
+"""
+Raw feed snapshot archive.
+
+Every downloaded feed body is zlib-compressed and stored in feed_blobs under
+its sha256, so a feed that hasn't changed since the last fetch costs one
+small feed_snapshots row. See replay.py for offline reprocessing.
+"""
+import hashlib
+import zlib
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import insert_ignoring_conflicts
+import models
+
+settings = get_settings()
+
+
+def archive_snapshot(db: Session, source_id: int, url: str, body: bytes) -> Optional[str]:
+    """Store body (once per distinct content) and record the fetch; returns the sha256"""
+    if not settings.snapshot_archive_enabled:
+        return None
+
+    digest = hashlib.sha256(body).hexdigest()
+    exists = db.query(models.FeedBlob.sha256).filter(models.FeedBlob.sha256 == digest).first()
+    if not exists:
+        compressed = zlib.compress(body, 9)
+        db.execute(
+            insert_ignoring_conflicts(models.FeedBlob)
+            .values(
+                sha256=digest,
+                data=compressed,
+                size=len(body),
+                compressed_size=len(compressed),
+                created_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing()
+        )
+
+    db.add(models.FeedSnapshot(source_id=source_id, sha256=digest, url=url))
+    db.commit()
+    return digest
+
+
+def archive_stats(db: Session) -> dict:
+    snapshots = db.query(func.count(models.FeedSnapshot.id)).scalar() or 0
+    blobs, size, compressed = db.query(
+        func.count(models.FeedBlob.sha256),
+        func.sum(models.FeedBlob.size),
+        func.sum(models.FeedBlob.compressed_size),
+    ).one()
+    return {
+        "snapshots": snapshots,
+        "distinct_bodies": blobs or 0,
+        "raw_bytes": size or 0,
+        "stored_bytes": compressed or 0,
+    }
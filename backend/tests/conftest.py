@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+
+# Settings are read at import time, so point the app at a throwaway database first
+_db_dir = tempfile.mkdtemp(prefix="brain_sync_test_")
+os.environ["ACCESS_TOKEN"] = "test-token"
+os.environ["QWEN_API_KEY"] = "test"
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from database import SessionLocal
+from migrations import run_migrations
+
+run_migrations()
+
+AUTH = {"Authorization": "Bearer test-token"}
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
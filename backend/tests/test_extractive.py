@@ -0,0 +1,12 @@
+from services.extractive_service import estimate_tokens, extract
+
+CONTENT = " ".join(
+    f"Sentence {i} covers GPU pricing, model 推理 latency and benchmark {i * 7} results."
+    for i in range(40)
+)
+
+
+def test_extract_counts_tokens_of_the_returned_text():
+    text, used = extract(CONTENT, 120)
+    assert text != CONTENT
+    assert used == estimate_tokens(text)
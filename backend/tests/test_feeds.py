@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+import main
+import models
+from services.maintenance_service import apply_retention_policy
+from tests.conftest import AUTH
+
+
+def test_feed_list_restores_compacted_content(db):
+    source = models.RSSSource(name="Blog", url="https://example.com/compact.xml", type="blog", category="AI")
+    db.add(source)
+    db.flush()
+    feed = models.Feed(
+        source_id=source.id,
+        title="old read",
+        link="https://example.com/old-read",
+        content="body of an old read feed",
+        published_at=datetime.utcnow() - timedelta(days=400),
+        created_at=datetime.utcnow() - timedelta(days=400),
+        is_read=True,
+        is_archived=False,
+    )
+    db.add(feed)
+    db.commit()
+
+    assert apply_retention_policy(db, days=30, mode="compact")["compacted"] >= 1
+    db.refresh(feed)
+    assert feed.content is None
+
+    client = TestClient(main.app)
+    rows = client.get("/feeds/", headers=AUTH).json()
+    row = next(r for r in rows if r["id"] == feed.id)
+    assert row["content"] == "body of an old read feed"
+
+
+def test_purge_clears_references_to_deleted_feeds(db):
+    source = models.RSSSource(name="Purge", url="https://example.com/purge.xml", type="blog", category="AI")
+    db.add(source)
+    db.flush()
+    old = datetime.utcnow() - timedelta(days=400)
+    feed = models.Feed(
+        source_id=source.id, title="purged", link="https://example.com/purged",
+        content="x", created_at=old, is_read=True, is_archived=False,
+    )
+    kept = models.Feed(
+        source_id=source.id, title="kept", link="https://example.com/kept",
+        content="y", created_at=datetime.utcnow(), is_read=False, is_archived=False,
+    )
+    db.add_all([feed, kept])
+    db.flush()
+    digest = models.Digest(period="daily", period_start=old, period_end=old + timedelta(days=1), category="AI")
+    db.add(digest)
+    db.flush()
+    db.add_all([
+        models.AnalysisLog(feed_id=feed.id, content_tokens_prefix=10, content_tokens_sent=5, route="default"),
+        models.Job(kind="analyze_feed", target_id=feed.id, status="done"),
+        models.DigestChunk(digest_id=digest.id, feed_ids=f"[{feed.id}, {kept.id}]", summary="s"),
+    ])
+    db.commit()
+    feed_id = feed.id
+
+    assert apply_retention_policy(db, days=30, mode="purge")["purged"] >= 1
+
+    assert db.query(models.Feed).filter(models.Feed.id == feed_id).count() == 0
+    assert db.query(models.AnalysisLog).filter(models.AnalysisLog.feed_id == feed_id).count() == 0
+    assert db.query(models.Job).filter(models.Job.kind == "analyze_feed", models.Job.target_id == feed_id).count() == 0
+    chunk = db.query(models.DigestChunk).filter(models.DigestChunk.digest_id == digest.id).one()
+    assert chunk.feed_ids == f"[{kept.id}]"
+
+
+def test_analyze_returns_job_without_waiting(db):
+    source = models.RSSSource(name="Queue", url="https://example.com/queue.xml", type="blog", category="AI")
+    db.add(source)
+    db.flush()
+    feed = models.Feed(source_id=source.id, title="queued", link="https://example.com/queued", content="x")
+    db.add(feed)
+    db.commit()
+
+    response = TestClient(main.app).post(f"/feeds/{feed.id}/analyze", headers=AUTH)
+
+    assert response.status_code == 202
+    job = db.query(models.Job).filter(models.Job.id == response.json()["job_id"]).one()
+    assert (job.kind, job.target_id, job.status) == ("analyze_feed", feed.id, "pending")
@@ -0,0 +1,27 @@
+from sqlalchemy import create_engine
+
+import migrations
+
+
+def test_feed_dedupe_keeps_the_analyzed_row_and_merges_flags():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for step in migrations.MIGRATIONS[:3]:
+            step(conn)
+        conn.exec_driver_sql("INSERT INTO rss_sources (id, name, url) VALUES (1, 's', 'https://example.com/rss')")
+        conn.exec_driver_sql("""
+            INSERT INTO feeds (id, source_id, title, link, content, is_analyzed, summary, is_read, is_archived)
+            VALUES (1, 1, 'a', 'https://example.com/a', 'x', 0, NULL, 1, 0),
+                   (2, 1, 'a', 'https://example.com/a', 'x', 1, 'sum', 0, 0),
+                   (3, 1, 'a', 'https://example.com/a', 'x', 0, NULL, 0, 1)
+        """)
+        conn.exec_driver_sql(
+            "INSERT INTO notes (title, content, category, feed_id) VALUES ('n', 'c', '投资', 3)"
+        )
+
+        migrations._single_flight_constraints(conn)
+
+        assert conn.exec_driver_sql("SELECT id, summary, is_read, is_archived FROM feeds").all() == [
+            (2, "sum", 1, 1)
+        ]
+        assert conn.exec_driver_sql("SELECT feed_id FROM notes").scalar() == 2
@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+
+import main
+from services.classifier_service import ONLINE_LEARNING_RATE, classifier
+from tests.conftest import AUTH
+
+
+def test_note_edits_train_only_on_relabel(monkeypatch):
+    steps = []
+    monkeypatch.setattr(
+        classifier, "partial_fit",
+        lambda text, category, tags, rate=ONLINE_LEARNING_RATE: steps.append((category, sorted(tags), rate)),
+    )
+    monkeypatch.setattr("services.classifier_service.retrain_in_background", lambda: None)
+    client = TestClient(main.app)
+    note = client.post(
+        "/notes/", headers=AUTH,
+        json={"title": "t", "content": "c", "category": "投资", "tag_names": ["a"]},
+    ).json()
+    steps.clear()
+
+    client.put(f"/notes/{note['id']}", headers=AUTH, json={"content": "edited"})
+    assert steps == []
+
+    client.put(f"/notes/{note['id']}", headers=AUTH, json={"category": "AI技术"})
+    assert steps == [("投资", ["a"], -ONLINE_LEARNING_RATE), ("AI技术", ["a"], ONLINE_LEARNING_RATE)]
@@ -0,0 +1,24 @@
+import asyncio
+
+import models
+from services.opml_service import import_opml
+
+OPML = b"""<?xml version="1.0"?>
+<opml version="2.0"><body><outline text="AI">
+  <outline text="New" xmlUrl="https://example.com/opml-new.xml"/>
+  <outline text="Old" xmlUrl="https://example.com/opml-old.xml"/>
+</outline></body></opml>"""
+
+
+def test_import_reports_only_rows_it_created(db):
+    old = models.RSSSource(name="Old", url="https://example.com/opml-old.xml", type="blog", category="AI")
+    db.add(old)
+    db.commit()
+
+    report = asyncio.run(import_opml(db, OPML, validate=False))
+
+    by_url = {r["feed_url"]: r for r in report["results"]}
+    new = db.query(models.RSSSource).filter(models.RSSSource.url == "https://example.com/opml-new.xml").one()
+    assert by_url[new.url]["status"] == "created"
+    assert by_url[new.url]["source_id"] == new.id
+    assert by_url[old.url]["status"] == "exists"
@@ -0,0 +1,29 @@
+import pytest
+
+from services.routing_service import choose_route, detect_language
+
+
+@pytest.mark.parametrize("title", [
+    "OpenAI 发布 GPT-5，推理能力大幅提升",
+    "Apple 发布 iPhone 16 Pro Max",
+    "NVIDIA H100 供不应求",
+    "谷歌开源 Gemma 2",
+])
+def test_mixed_chinese_headlines_are_zh(title):
+    assert detect_language(title) == "zh"
+
+
+@pytest.mark.parametrize("title", [
+    "OpenAI releases GPT-5 with better reasoning",
+    "Why the word 内卷 captures China's work culture",
+])
+def test_english_headlines_are_en(title):
+    assert detect_language(title) == "en"
+
+
+def test_no_letters_is_unknown():
+    assert detect_language("2024 — 100%") == "unknown"
+
+
+def test_chinese_title_skips_translation():
+    assert choose_route("OpenAI 发布 GPT-5", 100).translate_title is False
@@ -0,0 +1,171 @@
+"""
+Standalone ingest/analysis worker.
+
+The API only enqueues jobs (see services/job_service.py); one or more worker
+processes, on this host or others sharing the database, lease and run them:
+
+    python -m worker                    # one worker, all job kinds
+    python -m worker --concurrency 4    # four job slots in this process
+    python -m worker --kinds analyze_feed
+    python -m worker --once             # drain the queue and exit
+
+A worker that dies mid-job simply lets its lease expire; another worker then
+picks the job up again, so restarting either side never loses work.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import threading
+import time
+import traceback
+
+from config import get_settings
+from database import SessionLocal
+from migrations import run_migrations
+import models
+from services import job_service, profiling_service
+
+settings = get_settings()
+
+
+async def handle_fetch_source(job: models.Job, db) -> dict:
+    from services.rss_service import fetch_rss_feeds
+
+    source = db.query(models.RSSSource).filter(models.RSSSource.id == job.target_id).first()
+    if not source:
+        return {"message": "RSS source no longer exists", "new_feeds": 0}
+
+    new_feeds = await fetch_rss_feeds(source, db, raise_errors=True)
+    return {"message": f"Fetched {len(new_feeds)} new feeds", "new_feeds": len(new_feeds)}
+
+
+async def handle_analyze_feed(job: models.Job, db) -> dict:
+    from services.ai_service import analyze_feed_with_qwen
+
+    feed = db.query(models.Feed).filter(models.Feed.id == job.target_id).first()
+    if not feed:
+        raise ValueError("Feed not found")
+
+    if feed.is_analyzed:
+        return {
+            "translated_title": feed.translated_title,
+            "summary": feed.summary,
+            "insight": feed.insight
+        }
+
+    return await analyze_feed_with_qwen(feed, db)
+
+
+async def handle_build_digest(job: models.Job, db) -> dict:
+    from services.digest_service import build_digest
+
+    return build_digest(db, job.target_id)
+
+
+HANDLERS = {
+    "fetch_source": handle_fetch_source,
+    "analyze_feed": handle_analyze_feed,
+    "build_digest": handle_build_digest,
+}
+
+
+async def run_handler(job: models.Job, db, lease: job_service.LeaseKeeper) -> dict:
+    """Run the job's handler, cancelling it if the heartbeat loses the lease"""
+    task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    lease.on_lost = lambda: loop.call_soon_threadsafe(task.cancel)
+    return await HANDLERS[job.kind](job, db)
+
+
+def run_one(worker_id: str, kinds=None) -> bool:
+    """Claim and run a single job. Returns False when the queue is empty."""
+    db = SessionLocal()
+    try:
+        job = job_service.claim_job(db, worker_id, kinds)
+        if not job:
+            return False
+
+        print(f"▶️ [{worker_id}] job {job.id} {job.kind}({job.target_id}) attempt {job.attempts}")
+        started = time.perf_counter()
+        route_token = profiling_service.current_route.set(f"job:{job.kind}")
+        profile = profiling_service.begin(f"job:{job.kind}({job.target_id})")
+        try:
+            with job_service.LeaseKeeper(job) as lease, profiling_service.profiled():
+                result = asyncio.run(run_handler(job, db, lease))
+        except (job_service.LeaseLost, asyncio.CancelledError):
+            # Another worker owns the job now; leave its status alone
+            db.rollback()
+            print(f"⚠️ [{worker_id}] job {job.id} lost its lease, stopped")
+            return True
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ [{worker_id}] job {job.id} failed: {e}")
+            job_service.fail_job(db, job, f"{e}\n{traceback.format_exc()}")
+            return True
+        finally:
+            if profile:
+                print(f"🔬 [{worker_id}] profiled job {job.id}: {profile.stop()}")
+            profiling_service.current_route.reset(route_token)
+
+        if not job_service.complete_job(db, job, result):
+            print(f"⚠️ [{worker_id}] job {job.id} lease was lost before completion")
+        else:
+            print(f"✅ [{worker_id}] job {job.id} done in {time.perf_counter() - started:.2f}s")
+        return True
+    finally:
+        db.close()
+
+
+def worker_loop(worker_id: str, kinds=None, once: bool = False, stop: threading.Event = None):
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            busy = run_one(worker_id, kinds)
+        except Exception as e:
+            print(f"⚠️ [{worker_id}] worker error: {e}")
+            busy = False
+
+        if not busy:
+            if once:
+                return
+            stop.wait(settings.worker_poll_interval_seconds)
+
+
+def start_worker_threads(concurrency: int = 1, kinds=None, once: bool = False, stop: threading.Event = None):
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+    threads = []
+    for slot in range(concurrency):
+        thread = threading.Thread(
+            target=worker_loop,
+            args=(f"{base_id}:{slot}", kinds, once, stop),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Brain-Sync ingest/analysis worker")
+    parser.add_argument("--concurrency", type=int, default=1, help="job slots in this process")
+    parser.add_argument("--kinds", nargs="*", choices=job_service.JOB_KINDS, help="only run these job kinds")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args()
+
+    run_migrations()
+    print(f"🛠️ Worker started (concurrency={args.concurrency}, kinds={args.kinds or 'all'})")
+
+    stop = threading.Event()
+    threads = start_worker_threads(args.concurrency, args.kinds, args.once, stop)
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        stop.set()
+        print("👋 Worker stopping, unfinished jobs will be re-leased")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Link } from 'react-router-dom';
-import { feedsAPI, notesAPI, rssAPI } from '../services/api';
+import { feedsAPI, jobsAPI, notesAPI, rssAPI, openEventStream } from '../services/api';
 import ReactMarkdown from 'react-markdown';
 import rehypeRaw from 'rehype-raw';
 import './Feed.css';
 
+// The feed.analyzed event normally ends the wait; the job is only checked
+// this often in case the event was missed
+const JOB_FALLBACK_POLL_MS = 15000;
+
 export default function Feed() {
   const [feeds, setFeeds] = useState([]);
   const [sources, setSources] = useState([]);
@@ -17,11 +21,14 @@ export default function Feed() {
   const [categories, setCategories] = useState([]);
   const [showSaveModal, setShowSaveModal] = useState(false);
   const [selectedCategory, setSelectedCategory] = useState('');
+  const [suggestedTags, setSuggestedTags] = useState([]);
+  const [selectedTags, setSelectedTags] = useState([]);
   const [readFilter, setReadFilter] = useState('unread'); // 'all', 'unread', 'read'
   const [showAddRSSModal, setShowAddRSSModal] = useState(false);
   const [newRSS, setNewRSS] = useState({ name: '', url: '', type: 'rss' });
   const [contextMenu, setContextMenu] = useState(null); // { x, y, source }
   const [editingSource, setEditingSource] = useState(null); // Source being edited
+  const eventsRef = useRef(null);
 
   useEffect(() => {
     loadFeeds();
@@ -29,8 +36,17 @@ export default function Feed() {
     loadSources();
   }, []);
 
-  const loadFeeds = async () => {
-    setLoading(true);
+  // Refresh when new feeds arrive or an analysis finishes elsewhere
+  useEffect(() => {
+    const events = openEventStream();
+    eventsRef.current = events;
+    const refresh = () => loadFeeds(true);
+    ['feeds.new', 'feed.analyzed', 'resync'].forEach((type) => events.addEventListener(type, refresh));
+    return () => events.close();
+  }, []);
+
+  const loadFeeds = async (silent = false) => {
+    if (!silent) setLoading(true);
     try {
       const response = await feedsAPI.getFeeds({ unarchived_only: true });
       setFeeds(response.data);
@@ -98,13 +114,53 @@ export default function Feed() {
     }
   };
 
+  // Resolves with the analysis once the worker publishes feed.analyzed for
+  // this feed, or when the (rarely checked) job reports it finished
+  const waitForAnalysis = (feedId, jobId) => new Promise((resolve, reject) => {
+    const events = eventsRef.current;
+    let timer = null;
+    let done = false;
+
+    const finish = (callback, value) => {
+      if (done) return;
+      done = true;
+      clearTimeout(timer);
+      events?.removeEventListener('feed.analyzed', onAnalyzed);
+      callback(value);
+    };
+
+    const onAnalyzed = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.feed_id === feedId) finish(resolve, data);
+    };
+
+    const checkJob = async () => {
+      try {
+        const response = await jobsAPI.getJob(jobId);
+        if (response.data.status === 'done') return finish(resolve, response.data.result);
+        if (response.data.status === 'failed') return finish(reject, new Error(response.data.error));
+      } catch (error) {
+        console.error('Failed to check analysis job:', error);
+      }
+      if (!done) timer = setTimeout(checkJob, JOB_FALLBACK_POLL_MS);
+    };
+
+    events?.addEventListener('feed.analyzed', onAnalyzed);
+    // One check right away covers a job that finished before we subscribed
+    checkJob();
+  });
+
   const handleAIAnalysis = async () => {
     if (!selectedFeed) return;
     
     setAnalyzing(true);
     try {
       const response = await feedsAPI.analyzeFeed(selectedFeed.id);
-      setAnalysis(response.data);
+      // 202: the worker is still running
+      const result = response.status === 202
+        ? await waitForAnalysis(selectedFeed.id, response.data.job_id)
+        : response.data;
+      setAnalysis(result);
     } catch (error) {
       console.error('Failed to analyze feed:', error);
       alert('AI 分析失败,请重试');
@@ -113,6 +169,31 @@ export default function Feed() {
     }
   };
 
+  const openSaveModal = async () => {
+    setShowSaveModal(true);
+    setSuggestedTags([]);
+    setSelectedTags([]);
+    // Preselect what the local classifier suggests; the user can still
+    // change the category and untick tags before saving
+    try {
+      const response = await notesAPI.suggest({ feed_id: selectedFeed.id });
+      if (response.data.category) {
+        setSelectedCategory((current) => current || response.data.category);
+      }
+      const names = (response.data.tags || []).map((tag) => tag.name);
+      setSuggestedTags(names);
+      setSelectedTags((current) => (current.length ? current : names));
+    } catch (error) {
+      console.error('Failed to get category suggestion:', error);
+    }
+  };
+
+  const toggleTag = (name) => {
+    setSelectedTags((current) =>
+      current.includes(name) ? current.filter((tag) => tag !== name) : [...current, name]
+    );
+  };
+
   const handleSaveToVault = async () => {
     if (!selectedCategory) {
       alert('请选择分类');
@@ -139,6 +220,7 @@ ${selectedFeed.content || ''}
         title: analysis.translated_title || selectedFeed.title,
         content: noteContent,
         category: selectedCategory,
+        tag_names: selectedTags,
         feed_id: selectedFeed.id,
         original_link: selectedFeed.link,
       });
@@ -511,7 +593,7 @@ ${selectedFeed.content || ''}
                 </div>
 
                 <div className="detail-actions">
-                  <button className="btn btn-primary" onClick={() => setShowSaveModal(true)}>
+                  <button className="btn btn-primary" onClick={openSaveModal}>
                     💾 保存到知识库
                   </button>
                 </div>
@@ -541,6 +623,23 @@ ${selectedFeed.content || ''}
                 </label>
               ))}
             </div>
+            {suggestedTags.length > 0 && (
+              <>
+                <h4>推荐标签</h4>
+                <div className="suggested-tags">
+                  {suggestedTags.map((name) => (
+                    <label key={name} className="suggested-tag">
+                      <input
+                        type="checkbox"
+                        checked={selectedTags.includes(name)}
+                        onChange={() => toggleTag(name)}
+                      />
+                      <span>#{name}</span>
+                    </label>
+                  ))}
+                </div>
+              </>
+            )}
             <div className="modal-actions">
               <button className="btn btn-secondary" onClick={() => setShowSaveModal(false)}>
                 取消
@@ -32,6 +32,12 @@ export const rssAPI = {
   fetchFeeds: () => api.post('/rss/fetch'),
   fetchSourceFeeds: (id) => api.post(`/rss/sources/${id}/fetch`),
   syncFromConfig: () => api.post('/rss/sources/sync-from-config'),
+  exportOpml: () => api.get('/rss/sources/opml', { responseType: 'blob' }),
+  importOpml: (file, params) => {
+    const form = new FormData();
+    form.append('file', file);
+    return api.post('/rss/sources/opml', form, { params, headers: { 'Content-Type': 'multipart/form-data' } });
+  },
 };
 
 // Feeds API
@@ -43,6 +49,22 @@ export const feedsAPI = {
   archiveFeed: (id) => api.patch(`/feeds/${id}/archive`),
 };
 
+// Background jobs API
+export const jobsAPI = {
+  getJob: (id) => api.get(`/jobs/${id}`),
+};
+
+// Server-sent events API
+export const eventsAPI = {
+  getStreamToken: () => api.post('/events/token'),
+};
+
+// Digests API
+export const digestsAPI = {
+  getDigests: (params) => api.get('/digests/', { params }),
+  refresh: (period) => api.post('/digests/refresh', null, { params: { period } }),
+};
+
 // Notes API
 export const notesAPI = {
   getNotes: (params) => api.get('/notes/', { params }),
@@ -52,6 +74,69 @@ export const notesAPI = {
   deleteNote: (id) => api.delete(`/notes/${id}`),
   getCategories: () => api.get('/notes/categories/list'),
   getTags: () => api.get('/notes/tags/list'),
+  suggest: (payload) => api.post('/notes/suggest', payload),
+};
+
+// Server-sent events. EventSource can't set headers, so the URL carries a
+// short-lived stream token instead of the access token. When the browser gives
+// up reconnecting (e.g. the token expired), a new token is fetched and the
+// stream reopened from the last event id. Returns an EventSource-like object.
+export const openEventStream = () => {
+  const listeners = new Map(); // type -> Map(handler -> wrapped handler)
+  let source = null;
+  let lastEventId = null;
+  let retryTimer = null;
+  let closed = false;
+
+  const reconnect = () => {
+    source?.close();
+    source = null;
+    if (!closed) retryTimer = setTimeout(connect, 3000);
+  };
+
+  const connect = async () => {
+    try {
+      const response = await eventsAPI.getStreamToken();
+      if (closed) return;
+      const params = new URLSearchParams({ token: response.data.token });
+      if (lastEventId) params.set('last_event_id', lastEventId);
+      source = new EventSource(`${API_BASE_URL}/events/stream?${params}`);
+      listeners.forEach((handlers, type) =>
+        handlers.forEach((wrapped) => source.addEventListener(type, wrapped))
+      );
+      source.onerror = () => {
+        if (source?.readyState === EventSource.CLOSED) reconnect();
+      };
+    } catch (error) {
+      console.error('Failed to open event stream:', error);
+      reconnect();
+    }
+  };
+
+  connect();
+
+  return {
+    addEventListener(type, handler) {
+      const wrapped = (event) => {
+        if (event.lastEventId) lastEventId = event.lastEventId;
+        handler(event);
+      };
+      if (!listeners.has(type)) listeners.set(type, new Map());
+      listeners.get(type).set(handler, wrapped);
+      source?.addEventListener(type, wrapped);
+    },
+    removeEventListener(type, handler) {
+      const wrapped = listeners.get(type)?.get(handler);
+      if (!wrapped) return;
+      listeners.get(type).delete(handler);
+      source?.removeEventListener(type, wrapped);
+    },
+    close() {
+      closed = true;
+      clearTimeout(retryTimer);
+      source?.close();
+    },
+  };
 };
 
 export default api;
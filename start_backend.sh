@@ -2,4 +2,7 @@
 # Backend startup script
 cd backend
 . venv/bin/activate
+python -m worker &
+WORKER_PID=$!
+trap "kill $WORKER_PID" EXIT
 uvicorn main:app --host 0.0.0.0 --port 8000 --reload